@@ -1,7 +1,10 @@
 from pathlib import Path
 import os
+import tempfile
 from datetime import timedelta
-from decouple import config
+from decouple import Csv, config
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestInstrumentationMiddleware",
+    "core.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     'corsheaders.middleware.CorsMiddleware',
@@ -87,16 +92,67 @@ WSGI_APPLICATION = "HERo_backend.wsgi.application"
 
 TAGGIT_CASE_INSENSITIVE = True
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': config('DB_NAME'),
-        'USER': config('DB_USER'),
-        'PASSWORD': config('DB_PASSWORD'),
-        'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT', cast=int),
+# Persistent connections: each worker keeps its connection open for up to
+# DB_CONN_MAX_AGE seconds (0 closes it after every request) and checks it is
+# still usable before reusing it.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DATABASE_URL = config('DATABASE_URL', default='')
+
+if DATABASE_URL:
+    DATABASES = {
+        'default': dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
+    }
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        # A file-backed test database, so tests running requests on threads
+        # see committed rows and concurrent writers wait for each other.
+        DATABASES['default']['TEST'] = {
+            'NAME': os.path.join(tempfile.gettempdir(), 'hero_backend_test.sqlite3'),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME'),
+            'USER': config('DB_USER'),
+            'PASSWORD': config('DB_PASSWORD'),
+            'HOST': config('DB_HOST'),
+            'PORT': config('DB_PORT', cast=int),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+        }
+    }
+
+# Shared by every gunicorn worker so throttling and the response/role caches
+# hold across processes. Without REDIS_URL a file-based cache stands in
+# (shared between workers on one host, fine for development and tests). Its
+# incr() is not atomic across processes, so concurrent requests can lose
+# throttle counts; use Redis in production.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'hero_backend_cache')),
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                # Culling past this many entries can evict live throttle counters.
+                'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=100000, cast=int),
+            },
+        }
     }
-}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -127,29 +183,57 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
+
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='')
+
+STORAGES = {
+    "default": {
+        "BACKEND": "core.storage.HashedFileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+API_RENDERER_CLASSES = {
+    'json': 'core.renderers.FastJSONRenderer',
+    'stdjson': 'rest_framework.renderers.JSONRenderer',
+    'browsable': 'rest_framework.renderers.BrowsableAPIRenderer',
+}
+
+# Renderers offered for content negotiation, in preference order. Add
+# "browsable" only where the HTML browsable API should be reachable.
+API_RENDERERS = config('API_RENDERERS', default='json', cast=Csv())
+
+if not set(API_RENDERERS) <= set(API_RENDERER_CLASSES):
+    unknown = sorted(set(API_RENDERERS) - set(API_RENDERER_CLASSES))
+    raise ImproperlyConfigured(
+        f"Unknown API_RENDERERS: {', '.join(unknown)}. Valid names: {', '.join(API_RENDERER_CLASSES)}."
+    )
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': "rest_framework.pagination.PageNumberPagination",
     'PAGE_SIZE': 10,
     'EXCEPTION_HANDLER': 'api.exceptions.api_exception_handler',
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+    'DEFAULT_RENDERER_CLASSES': [API_RENDERER_CLASSES[name] for name in API_RENDERERS],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'core.authentication.CsrfExemptSessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication', 
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.HeaderDispatchAuthentication',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'core.throttling.FixedWindowAnonRateThrottle',
+        'core.throttling.FixedWindowUserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '1000/day',
@@ -157,10 +241,64 @@ REST_FRAMEWORK = {
     }
 }
 
+ROLE_CACHE_TIMEOUT = config('ROLE_CACHE_TIMEOUT', default=300, cast=int)
+
+BASIC_AUTH_CACHE_TIMEOUT = config('BASIC_AUTH_CACHE_TIMEOUT', default=60, cast=int)
+
+ARTICLE_CACHE_TIMEOUT = config('ARTICLE_CACHE_TIMEOUT', default=300, cast=int)
+
+IMAGE_MAX_DIMENSION = config('IMAGE_MAX_DIMENSION', default=2048, cast=int)
+
+IMAGE_QUALITY = config('IMAGE_QUALITY', default=85, cast=int)
+
+IMAGE_PROCESSING_ASYNC = config('IMAGE_PROCESSING_ASYNC', default=True, cast=bool)
+
+IMAGE_PROCESSING_WORKERS = config('IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+
+REQUEST_INSTRUMENTATION = config('REQUEST_INSTRUMENTATION', default=False, cast=bool)
+
+REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD = config('REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD', default=3, cast=int)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "core.instrumentation": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+RESPONSE_COMPRESSION = config('RESPONSE_COMPRESSION', default=True, cast=bool)
+
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=False, cast=bool)
+
+# Stateless auth trusts the role and active claims until the access token
+# expires, so deactivations and demotions take up to one token lifetime to
+# apply. Keep that window short.
+JWT_STATELESS_MAX_ACCESS_TOKEN_MINUTES = 60
+JWT_ACCESS_TOKEN_MINUTES = config('JWT_ACCESS_TOKEN_MINUTES', default=10 if JWT_STATELESS_AUTH else 28 * 24 * 60, cast=int)
+
+if JWT_STATELESS_AUTH and JWT_ACCESS_TOKEN_MINUTES > JWT_STATELESS_MAX_ACCESS_TOKEN_MINUTES:
+    raise ImproperlyConfigured(
+        f"JWT_STATELESS_AUTH requires JWT_ACCESS_TOKEN_MINUTES of at most "
+        f"{JWT_STATELESS_MAX_ACCESS_TOKEN_MINUTES} (got {JWT_ACCESS_TOKEN_MINUTES})."
+    )
+
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=28),
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=JWT_ACCESS_TOKEN_MINUTES),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=365),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "TOKEN_OBTAIN_SERIALIZER": "api.serializers.APITokenObtainPairSerializer",
+    "TOKEN_USER_CLASS": "core.authentication.RoleTokenUser",
 }
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, post_migrate, pre_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 
 
@@ -7,23 +7,141 @@ class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
 
+    def ready(self):
+        post_migrate.connect(ApiConfig.perform_ensure_default_groups, sender=self)
+
+    def perform_ensure_default_groups(sender, **kwargs):
+        from core.roles import ensure_default_groups
+
+        ensure_default_groups()
+
     @receiver(post_save, sender='auth.User')
-    def perform_add_user_to_users_group(sender, instance, created, **kwargs):
-        from django.contrib.auth.models import Group, User
+    def perform_add_user_to_users_group(sender, instance, created, raw, **kwargs):
+        from django.db import transaction
         from api.models import UserProfile
+        from core.roles import get_group_id, remember_user_groups
         from rest_framework.authtoken.models import Token
 
-        group_names = ["Users", "Moderators", "Admins"]
-        for group_name in group_names:
-            Group.objects.get_or_create(name=group_name)
-        
-        if not created:
+        if not created or raw:
             return
-        
-        group, _ = Group.objects.get_or_create(name='Users')
-        instance.groups.add(group)
-        instance.save()
-        
-        UserProfile.objects.get_or_create(user=instance)
-        Token.objects.get_or_create(user=instance)
-        print(f'User {instance.username} added to the group {group.name}')
\ No newline at end of file
+
+        with transaction.atomic():
+            instance.groups.through.objects.create(user_id=instance.pk, group_id=get_group_id('Users'))
+            UserProfile.objects.create(user=instance)
+            Token.objects.create(user=instance)
+        remember_user_groups(instance, ['Users'])
+
+    @receiver(post_save, sender='api.Article')
+    def perform_update_article_search_vector(sender, instance, **kwargs):
+        from api.search import update_search_vectors
+
+        update_search_vectors(sender.objects.filter(pk=instance.pk))
+
+    @receiver(m2m_changed, sender='taggit.TaggedItem')
+    def perform_update_tagged_article_search_vector(sender, instance, action, **kwargs):
+        from api.models import Article
+        from api.search import update_search_vectors
+
+        if isinstance(instance, Article) and action in ("post_add", "post_remove", "post_clear"):
+            update_search_vectors(Article.objects.filter(pk=instance.pk))
+
+    @receiver(m2m_changed, sender='auth.User_groups')
+    def perform_invalidate_user_groups(sender, instance, action, reverse, pk_set, **kwargs):
+        from core.roles import invalidate_user_groups
+
+        if not reverse and action in ("post_add", "post_remove", "post_clear"):
+            instance.__dict__.pop("_group_names", None)
+            invalidate_user_groups(instance.pk)
+        elif reverse and action in ("post_add", "post_remove"):
+            invalidate_user_groups(*pk_set)
+        elif reverse and action == "pre_clear":
+            invalidate_user_groups(*instance.user_set.values_list("pk", flat=True))
+
+    @receiver([post_save, pre_delete], sender='auth.Group')
+    def perform_invalidate_group_members(sender, instance, **kwargs):
+        from core.roles import forget_group_ids, invalidate_user_groups
+
+        forget_group_ids()
+        if not kwargs.get("created"):
+            invalidate_user_groups(*instance.user_set.values_list("pk", flat=True))
+
+    @receiver(pre_save, sender='api.Article')
+    def perform_prepare_article_image(sender, instance, raw, **kwargs):
+        from api.images import prepare_upload
+
+        if not raw:
+            prepare_upload(instance, 'image')
+
+    @receiver(pre_save, sender='api.UserProfile')
+    def perform_prepare_profile_pic(sender, instance, raw, **kwargs):
+        from api.images import prepare_upload
+
+        if not raw:
+            prepare_upload(instance, 'profile_pic')
+
+    @receiver(post_save, sender='api.Article')
+    def perform_process_article_image(sender, instance, raw, **kwargs):
+        from api.images import schedule_image_processing
+
+        if not raw:
+            schedule_image_processing(instance, 'image')
+
+    @receiver(post_save, sender='api.UserProfile')
+    def perform_process_profile_pic(sender, instance, raw, **kwargs):
+        from api.images import schedule_image_processing
+
+        if not raw:
+            schedule_image_processing(instance, 'profile_pic')
+
+    @receiver(post_save, sender='api.ArticleLike')
+    def perform_increment_like_count(sender, instance, created, raw, **kwargs):
+        from django.db.models import F
+        from api.models import Article
+
+        if created and not raw:
+            Article.objects.filter(pk=instance.article_id).update(like_count=F('like_count') + 1)
+
+    @receiver(post_delete, sender='api.ArticleLike')
+    def perform_decrement_like_count(sender, instance, origin=None, **kwargs):
+        from django.db.models import F, QuerySet
+        from api.models import Article
+
+        # Covers admin and queryset deletes, not just the API. Likes deleted with
+        # their article need no count, and profile deletes are counted up front.
+        origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+        if origin is None or origin_model is sender:
+            Article.objects.filter(pk=instance.article_id, like_count__gt=0).update(like_count=F('like_count') - 1)
+
+    @receiver(pre_delete, sender='api.UserProfile')
+    def perform_uncount_profile_likes(sender, instance, **kwargs):
+        from django.db.models import F
+        from api.models import Article, ArticleLike
+
+        # A profile likes an article at most once, so one UPDATE covers all of them.
+        liked = ArticleLike.objects.filter(user_id=instance.pk).values('article_id')
+        Article.objects.filter(pk__in=liked, like_count__gt=0).update(like_count=F('like_count') - 1)
+
+    @receiver([post_save, post_delete], sender='api.Article')
+    @receiver([post_save, post_delete], sender='api.ArticleLike')
+    @receiver([post_save, post_delete], sender='api.UserProfile')
+    @receiver(m2m_changed, sender='taggit.TaggedItem')
+    def perform_invalidate_article_cache(sender, origin=None, **kwargs):
+        from django.db import transaction
+        from api.caching import invalidate_article_cache
+
+        # A delete sends this for every row it cascades to; invalidate once per delete.
+        if origin is not None:
+            if getattr(origin, '_article_cache_invalidated', False):
+                return
+            origin._article_cache_invalidated = True
+        invalidate_article_cache()
+        transaction.on_commit(invalidate_article_cache)
+
+    @receiver(post_save, sender='auth.User')
+    def perform_invalidate_article_cache_on_rename(sender, instance, created, update_fields, **kwargs):
+        from django.db import transaction
+        from api.caching import invalidate_article_cache
+
+        if not created and (update_fields is None or 'username' in update_fields):
+            invalidate_article_cache()
+            transaction.on_commit(invalidate_article_cache)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Async, ASGI-native versions of the public article read endpoints. They use
+Django's async ORM and return the same JSON as their ArticleViewSet
+counterparts, so under uvicorn a process serves many concurrent readers
+without dedicating a thread to each request.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from core.utils import try_parse_int
+from .models import Article, ArticleLike, Comment, attach_replies
+from .serializers import ArticleLikeSerializer, ThreadedCommentSerializer
+from .views import ArticleViewSet
+
+PAGE_SIZE = settings.REST_FRAMEWORK["PAGE_SIZE"]
+
+
+def json_response(data, status=200):
+     return JsonResponse(data, encoder=JSONEncoder, safe=False, status=status)
+
+def not_found():
+     return json_response({"error": "Resource not found."}, status=404)
+
+def invalid_page():
+     return json_response({"detail": "Invalid page."}, status=404)
+
+def article_view(request, action):
+     # Reuses the viewset's queryset, filter backends (filters, search,
+     # ordering) and field selection so the async endpoints accept the same
+     # query parameters. The endpoints are public and anonymous: no
+     # authenticators run, so no sync database access happens for the user.
+     return ArticleViewSet(request=Request(request, authenticators=()), action=action, format_kwarg=None, args=(), kwargs={})
+
+def filter_articles(view):
+     return view.filter_queryset(view.get_queryset())
+
+async def paginate(request, queryset):
+     page = try_parse_int(request.GET.get("page", 1))
+     count = await queryset.acount()
+     if page is None or page < 1 or (page - 1) * PAGE_SIZE >= max(count, 1):
+          return None
+
+     offset = (page - 1) * PAGE_SIZE
+     results = [obj async for obj in queryset[offset:offset + PAGE_SIZE]]
+     url = request.build_absolute_uri()
+     next_url = replace_query_param(url, "page", page + 1) if offset + PAGE_SIZE < count else None
+     if page == 1:
+          previous_url = None
+     elif page == 2:
+          previous_url = remove_query_param(url, "page")
+     else:
+          previous_url = replace_query_param(url, "page", page - 1)
+     return {"count": count, "next": next_url, "previous": previous_url, "results": results}
+
+@require_GET
+async def article_list(request):
+     view = article_view(request, "list")
+     try:
+          queryset = await sync_to_async(filter_articles)(view)
+     except ValidationError as exc:
+          return json_response(exc.detail, status=400)
+     page = await paginate(request, queryset)
+     if page is None:
+          return invalid_page()
+     page["results"] = view.get_serializer(page["results"], many=True).data
+     return json_response(page)
+
+@require_GET
+async def article_detail(request, pk):
+     view = article_view(request, "retrieve")
+     try:
+          queryset = view.get_queryset()
+     except ValidationError as exc:
+          return json_response(exc.detail, status=400)
+     article = await queryset.filter(pk=pk).afirst()
+     if article is None:
+          return not_found()
+     return json_response(view.get_serializer(article).data)
+
+@require_GET
+async def article_comments(request, pk):
+     if not await Article.objects.filter(pk=pk).aexists():
+          return not_found()
+
+     roots = Comment.objects.filter(article_id=pk, reply_to=None).select_related("author__user").order_by("created_at", "id")
+     page = await paginate(request, roots)
+     if page is None:
+          return invalid_page()
+     max_depth = try_parse_int(request.GET.get("depth"))
+     threads = await sync_to_async(attach_replies)(page["results"], max_depth)
+     page["results"] = ThreadedCommentSerializer(threads, many=True, context={"request": request}).data
+     return json_response(page)
+
+@require_GET
+async def article_likes(request, pk):
+     if not await Article.objects.filter(pk=pk).aexists():
+          return not_found()
+
+     likes = ArticleLike.objects.filter(article_id=pk).select_related("user__user").order_by("created_at")
+     likes = [like async for like in likes]
+     return json_response(ArticleLikeSerializer(likes, many=True, context={"request": request}).data)
@@ -0,0 +1,71 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+ARTICLE_CACHE_VERSION_KEY = "article-cache-version"
+
+
+def article_cache_version():
+     """
+     Nanosecond timestamp of the last change to anything rendered by the
+     article endpoints. Cached responses are keyed on it, so bumping it
+     invalidates all of them at once.
+     """
+     version = cache.get(ARTICLE_CACHE_VERSION_KEY)
+     if version is None:
+          cache.add(ARTICLE_CACHE_VERSION_KEY, time.time_ns(), None)
+          version = cache.get(ARTICLE_CACHE_VERSION_KEY)
+     return version
+
+def invalidate_article_cache():
+     cache.set(ARTICLE_CACHE_VERSION_KEY, time.time_ns(), None)
+
+class AnonymousResponseCacheMixin:
+     """
+     Serves list and retrieve for anonymous GETs from the cache, keyed on the
+     normalized query string, with ETag/Last-Modified conditional responses.
+     """
+     response_cache_prefix = "article-response"
+
+     def list(self, request, *args, **kwargs):
+          return self.cached_response(super().list, request, *args, **kwargs)
+
+     def retrieve(self, request, *args, **kwargs):
+          return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+     def response_cache_key(self, request, version):
+          query = urlencode(sorted(request.query_params.lists()), doseq=True)
+          lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, "")
+          raw_key = f"{request.scheme}://{request.get_host()}|{self.action}|{lookup}|{query}"
+          return f"{self.response_cache_prefix}:{version}:{hashlib.md5(raw_key.encode()).hexdigest()}"
+
+     def cached_response(self, handler, request, *args, **kwargs):
+          if request.user.is_authenticated or not settings.ARTICLE_CACHE_TIMEOUT:
+               return handler(request, *args, **kwargs)
+
+          version = article_cache_version()
+          key = self.response_cache_key(request, version)
+          etag = f'"{key.rsplit(":", 1)[1]}-{version}"'
+          last_modified = version // 1_000_000_000
+
+          not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+          if not_modified is not None:
+               return not_modified
+
+          data = cache.get(key)
+          if data is None:
+               response = handler(request, *args, **kwargs)
+               if response.status_code != 200:
+                    return response
+               data = response.data
+               cache.set(key, data, settings.ARTICLE_CACHE_TIMEOUT)
+
+          response = Response(data)
+          response["ETag"] = etag
+          response["Last-Modified"] = http_date(last_modified)
+          return response
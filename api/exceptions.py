@@ -2,7 +2,7 @@ from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework import status
 from django.http import Http404
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError
 from rest_framework.exceptions import Throttled
 
 def api_exception_handler(exc, context):
@@ -10,6 +10,8 @@ def api_exception_handler(exc, context):
      
      if isinstance(exc, Http404):
           return Response({"error":"Resource not found."}, status=status.HTTP_404_NOT_FOUND)
+     elif isinstance(exc, ValidationError):
+          return Response({"error": " ".join(exc.messages)}, status=status.HTTP_400_BAD_REQUEST)
      elif isinstance(exc, ValueError):
           return Response({"error":"Invalid input."}, status=status.HTTP_400_BAD_REQUEST)
      elif isinstance(exc, PermissionDenied):
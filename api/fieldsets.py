@@ -0,0 +1,68 @@
+from rest_framework.exceptions import ValidationError
+
+
+class DynamicFieldsMixin:
+     """
+     Serializer mixin taking a `fields` argument: any other declared field is
+     dropped, so its SerializerMethodField is never evaluated.
+     """
+
+     def __init__(self, *args, fields=None, **kwargs):
+          super().__init__(*args, **kwargs)
+          if fields is not None:
+               for name in set(self.fields) - set(fields):
+                    self.fields.pop(name)
+
+class SparseFieldsetMixin:
+     """
+     Lets GET requests pick the serialized fields with ?fields=a,b and drop
+     some with ?omit=c. Lists default to `summary_fields` unless the client
+     asks for ?view=full. The chosen fields are passed to the serializer and
+     to `narrow_queryset`, so views can stop loading what is not rendered.
+     """
+     summary_fields = None
+     fields_param = "fields"
+     omit_param = "omit"
+
+     def get_requested_fields(self):
+          """Set of field names to render, or None for all of them."""
+          if not hasattr(self, "_requested_fields"):
+               self._requested_fields = self.resolve_requested_fields()
+          return self._requested_fields
+
+     def resolve_requested_fields(self):
+          request = getattr(self, "request", None)
+          if request is None or request.method not in ("GET", "HEAD"):
+               return None
+          params = request.query_params
+          # Write-only fields (e.g. the HiddenField author) are never rendered.
+          available = {name for name, field in self.get_serializer_class()().fields.items() if not field.write_only}
+
+          requested = self.parse_field_list(params.get(self.fields_param), available)
+          if requested is None and self.action == "list" and params.get("view") != "full":
+               requested = set(self.summary_fields) if self.summary_fields is not None else None
+          omitted = self.parse_field_list(params.get(self.omit_param), available)
+          if omitted:
+               requested = (available if requested is None else requested) - omitted
+          return requested
+
+     def parse_field_list(self, value, available):
+          if value is None:
+               return None
+          names = {name.strip() for name in value.split(",") if name.strip()}
+          unknown = names - available
+          if unknown:
+               raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."})
+          return names
+
+     def get_serializer(self, *args, **kwargs):
+          fields = self.get_requested_fields()
+          if fields is not None:
+               kwargs.setdefault("fields", fields)
+          return super().get_serializer(*args, **kwargs)
+
+     def get_queryset(self):
+          return self.narrow_queryset(super().get_queryset(), self.get_requested_fields())
+
+     def narrow_queryset(self, queryset, fields):
+          return queryset
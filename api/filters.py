@@ -7,7 +7,7 @@ class ArticleFilter(filters.FilterSet):
 
      class Meta:
           model = Article
-          fields = ['title', 'author', 'created_at', 'updated_at', 'category']
+          fields = ['title', 'author', 'created_at', 'updated_at', 'category', 'status']
 
      def filter_by_tags(self, queryset, name, value):
           return queryset.filter(tags__name__icontains=value)
@@ -0,0 +1,200 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> longest edge in pixels.
+IMAGE_VARIANT_SIZES = {
+     "thumbnail": 320,
+     "medium": 1024,
+}
+# Output format -> (Pillow format, file extension).
+IMAGE_VARIANT_FORMATS = {
+     "webp": ("WEBP", "webp"),
+     "jpeg": ("JPEG", "jpg"),
+}
+WRITABLE_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+# Image.info entries that carry metadata rather than affect rendering.
+METADATA_KEYS = {"exif", "xmp", "XML:com.adobe.xmp", "icc_profile", "comment", "photoshop"}
+EXIF_ORIENTATION = 0x0112
+
+_executor = None
+
+
+def get_executor():
+     global _executor
+     if _executor is None:
+          _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_PROCESSING_WORKERS, thread_name_prefix="images")
+     return _executor
+
+def variant_name(name, variant, extension):
+     directory, filename = posixpath.split(name)
+     stem = posixpath.splitext(filename)[0]
+     return posixpath.join(directory, "variants", f"{stem}_{variant}.{extension}")
+
+def variant_urls(field_file, variants, request=None):
+     """
+     Maps each stored variant to its URL, absolute when a request is given
+     (matching how DRF renders the ImageField itself). Empty until the
+     variants for the current upload have been generated.
+     """
+     if not field_file or variants.get("source") != field_file.name:
+          return {}
+     urls = {}
+     for variant, names in variants.get("files", {}).items():
+          urls[variant] = {}
+          for output, name in names.items():
+               url = field_file.storage.url(name)
+               urls[variant][output] = request.build_absolute_uri(url) if request else url
+     return urls
+
+def encode(image, image_format):
+     if image_format == "JPEG" and image.mode != "RGB":
+          image = flatten(image)
+     elif image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+          image = image.convert("RGBA")
+     buffer = BytesIO()
+     image.save(buffer, format=image_format, quality=settings.IMAGE_QUALITY, optimize=image_format != "WEBP")
+     return ContentFile(buffer.getvalue())
+
+def flatten(image):
+     image = image.convert("RGBA")
+     background = Image.new("RGB", image.size, (255, 255, 255))
+     background.paste(image, mask=image.getchannel("A"))
+     return background
+
+def needs_normalizing(image):
+     """
+     Whether an opened (not yet decoded) image differs from what is stored
+     after normalizing. Only reads what Pillow parsed from the header.
+     """
+     return (
+          image.format not in WRITABLE_FORMATS
+          or image.getexif().get(EXIF_ORIENTATION, 1) != 1
+          or not METADATA_KEYS.isdisjoint(image.info)
+          or max(image.size) > settings.IMAGE_MAX_DIMENSION
+     )
+
+def load_normalized(source):
+     """
+     Opens an image with EXIF orientation applied, metadata stripped and the
+     longest edge capped at IMAGE_MAX_DIMENSION. Returns the image, the format
+     to store it in, and whether any of that changed the stored file.
+     """
+     image = Image.open(source)
+     image_format = image.format if image.format in WRITABLE_FORMATS else "JPEG"
+     changed = needs_normalizing(image)
+     max_dimension = settings.IMAGE_MAX_DIMENSION
+     image = ImageOps.exif_transpose(image)
+     image.load()
+     # Drop EXIF, XMP, ICC and comments; only transparency affects rendering.
+     image.info = {key: value for key, value in image.info.items() if key == "transparency"}
+     image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+     return image, image_format, changed
+
+def prepare_upload(instance, field_name):
+     """
+     Gives a new upload the extension of the format process_image stores it
+     in, so its name stays valid when the job rewrites it in place. Only the
+     header is read; decoding and re-encoding stay off the request thread.
+     """
+     field_file = getattr(instance, field_name)
+     if not field_file or field_file._committed:
+          return
+     try:
+          field_file.seek(0)
+          with Image.open(field_file) as image:
+               image_format = image.format if image.format in WRITABLE_FORMATS else "JPEG"
+     except (OSError, ValueError):
+          # Not an image Pillow can read; process_image leaves it alone too.
+          return
+     finally:
+          field_file.seek(0)
+
+     stem, extension = posixpath.splitext(field_file.name)
+     if Image.registered_extensions().get(extension.lower()) != image_format:
+          field_file.name = stem + (".jpg" if image_format == "JPEG" else f".{image_format.lower()}")
+
+def process_image(model_label, pk, field_name):
+     """
+     Writes the WebP/JPEG variants of the stored upload of `field_name` and
+     records them in `<field_name>_variants`. The upload itself is first
+     normalized (see load_normalized) in place, keeping its stored name.
+     """
+     model = apps.get_model(model_label)
+     variants_field = f"{field_name}_variants"
+     instance = model.objects.filter(pk=pk).only(field_name, variants_field).first()
+     if instance is None:
+          return
+     field_file = getattr(instance, field_name)
+     previous = getattr(instance, variants_field) or {}
+     if previous.get("source") == field_file.name:
+          return
+
+     storage = field_file.storage
+     variants = {}
+     if field_file:
+          with field_file.open("rb") as source:
+               image, image_format, changed = load_normalized(source)
+          stored_name = field_file.name
+          if changed:
+               storage.overwrite(stored_name, encode(image, image_format))
+
+          files = {}
+          for variant, size in IMAGE_VARIANT_SIZES.items():
+               resized = image.copy()
+               resized.thumbnail((size, size), Image.LANCZOS)
+               files[variant] = {}
+               for output, (output_format, extension) in IMAGE_VARIANT_FORMATS.items():
+                    name = variant_name(stored_name, variant, extension)
+                    files[variant][output] = storage.save(name, encode(resized, output_format))
+          variants = {"source": stored_name, "files": files}
+     updated = model.objects.filter(pk=pk, **{field_name: field_file.name}).update(**{variants_field: variants})
+
+     # A newer upload replaced this one while it was processed; its own job records it.
+     if not updated:
+          for names in variants.get("files", {}).values():
+               for name in names.values():
+                    storage.delete(name)
+          return
+     current = {name for names in variants.get("files", {}).values() for name in names.values()}
+     for names in previous.get("files", {}).values():
+          for name in names.values():
+               if name not in current:
+                    storage.delete(name)
+
+     from .caching import invalidate_article_cache
+     invalidate_article_cache()
+
+def run_image_job(model_label, pk, field_name):
+     try:
+          process_image(model_label, pk, field_name)
+     except Exception:
+          logger.exception("Processing %s %s.%s failed", model_label, pk, field_name)
+     finally:
+          if settings.IMAGE_PROCESSING_ASYNC:
+               connections.close_all()
+
+def schedule_image_processing(instance, field_name):
+     """
+     Queues processing of `field_name` once the current transaction commits,
+     if its upload changed since the variants were last generated. Runs on a
+     background thread unless IMAGE_PROCESSING_ASYNC is off.
+     """
+     field_file = getattr(instance, field_name)
+     variants = getattr(instance, f"{field_name}_variants") or {}
+     if variants.get("source", "") == (field_file.name or ""):
+          return
+
+     job = (instance._meta.label, instance.pk, field_name)
+     if settings.IMAGE_PROCESSING_ASYNC:
+          transaction.on_commit(lambda: get_executor().submit(run_image_job, *job))
+     else:
+          transaction.on_commit(lambda: run_image_job(*job))
@@ -0,0 +1,86 @@
+"""
+Idempotent like/unlike writes. On PostgreSQL each is a single statement: the
+INSERT ... ON CONFLICT DO NOTHING (or DELETE) runs in a CTE and the article's
+like_count is adjusted by the number of rows it touched, returning the new
+count. Concurrent requests for the same like cannot raise IntegrityError and
+never count a like twice.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .caching import invalidate_article_cache
+from .models import Article, ArticleLike, UserProfile
+
+
+def _tables():
+     qn = connection.ops.quote_name
+     return qn(ArticleLike._meta.db_table), qn(Article._meta.db_table), qn(UserProfile._meta.db_table)
+
+def _insert_sql():
+     like_table, _, profile_table = _tables()
+     # The profile is looked up inside the statement so the view needs no extra query.
+     return (
+          f"INSERT INTO {like_table} (user_id, article_id, reaction, created_at) "
+          f"SELECT id, %s, %s, %s FROM {profile_table} WHERE user_id = %s "
+          f"ON CONFLICT (user_id, article_id) DO NOTHING"
+     )
+
+def _delete_sql():
+     like_table, _, profile_table = _tables()
+     return (
+          f"DELETE FROM {like_table} WHERE article_id = %s "
+          f"AND user_id IN (SELECT id FROM {profile_table} WHERE user_id = %s)"
+     )
+
+def _adjust_like_count(cursor, statement, params, article_id, sign):
+     """
+     Runs `statement` and moves like_count by its row count. Returns
+     `(like_count, rows changed)`, or None if the article does not exist.
+     """
+     if connection.vendor == "postgresql":
+          _, article_table, _ = _tables()
+          cursor.execute(
+               f"WITH changed AS ({statement} RETURNING 1) "
+               f"UPDATE {article_table} SET like_count = GREATEST(like_count {sign} (SELECT count(*) FROM changed), 0) "
+               f"WHERE id = %s RETURNING like_count, (SELECT count(*) FROM changed)",
+               [*params, article_id],
+          )
+          row = cursor.fetchone()
+          return None if row is None else (row[0], row[1])
+
+     # Other backends: the same statements, inside the caller's transaction.
+     cursor.execute(statement, params)
+     changed = cursor.rowcount
+     articles = Article.objects.filter(pk=article_id)
+     if changed:
+          delta = changed if sign == "+" else -changed
+          articles.update(like_count=Greatest(F("like_count") + delta, 0))
+     like_count = articles.values_list("like_count", flat=True).first()
+     return None if like_count is None else (like_count, changed)
+
+def set_article_like(article_id, user, liked):
+     """
+     Makes `user`'s like on the article exist (`liked=True`) or not. Returns
+     `(like_count, changed, liked)`, where `liked` says whether the like now
+     exists, or None when the article does not exist.
+     """
+     if liked:
+          created_at = ArticleLike._meta.get_field("created_at").get_db_prep_value(timezone.now(), connection)
+          statement, params = _insert_sql(), [article_id, "like", created_at, user.pk]
+     else:
+          statement, params = _delete_sql(), [article_id, user.pk]
+
+     with transaction.atomic(), connection.cursor() as cursor:
+          result = _adjust_like_count(cursor, statement, params, article_id, "+" if liked else "-")
+          if result is None:
+               # Undo a like inserted for a missing article before its foreign key is checked.
+               transaction.set_rollback(True)
+               return None
+     if result[1]:
+          invalidate_article_cache()
+     else:
+          # Nothing inserted: either the like was already there, or the user
+          # has no profile (e.g. loaded from a raw fixture) to like with.
+          liked = liked and UserProfile.objects.filter(user_id=user.pk).exists()
+     return result[0], bool(result[1]), liked
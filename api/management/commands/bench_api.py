@@ -0,0 +1,156 @@
+import json
+import math
+import os
+import random
+from datetime import datetime, timezone
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+from api.models import Article
+from api.seeding import generate_fake_data, rebuild_derived_data
+from core.benchmark import WSGIClient, compare_results, run_scenario
+
+BENCH_PASSWORD = "Bench-password-1"
+
+
+class Command(BaseCommand):
+     help = "Seeds a dataset and benchmarks the main API endpoints in-process, optionally against a JSON baseline"
+
+     def add_arguments(self, parser):
+          parser.add_argument("--iterations", type=int, default=200, help="Timed requests per scenario.")
+          parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per scenario.")
+          parser.add_argument("--scenario", action="append", help="Run only these scenarios (repeatable).")
+          parser.add_argument("--users", type=int, default=50)
+          parser.add_argument("--articles", type=int, default=500)
+          parser.add_argument("--comments", type=int, default=2000)
+          parser.add_argument("--likes", type=int, default=2000)
+          parser.add_argument("--seed", type=int, default=1, help="Random seed for the dataset and scenarios.")
+          parser.add_argument(
+               "--use-current-db", action="store_true",
+               help="Seed and benchmark the configured database instead of a throwaway test database.",
+          )
+          parser.add_argument("--response-cache", action="store_true", help="Keep the anonymous article response cache on.")
+          parser.add_argument("--output", help="Write the results as JSON to this file.")
+          parser.add_argument("--baseline", help="Compare against a previous --output file.")
+          parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 slowdown against the baseline.")
+          parser.add_argument("--fail-on-regression", action="store_true", help="Exit with an error when regressions are found.")
+
+     def handle(self, *args, **options):
+          old_name = None
+          if not options["use_current_db"]:
+               old_name = connection.settings_dict["NAME"]
+               connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+          try:
+               results = self.run(options)
+          finally:
+               if old_name is not None:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+          if options["output"]:
+               os.makedirs(os.path.dirname(os.path.abspath(options["output"])), exist_ok=True)
+               with open(options["output"], "w") as file:
+                    json.dump(results, file, indent=5)
+               self.stdout.write(f"Results written to {options['output']}")
+
+          if options["baseline"]:
+               with open(options["baseline"]) as file:
+                    regressions = compare_results(results, json.load(file), options["tolerance"])
+               for regression in regressions:
+                    self.stdout.write(self.style.WARNING(f"Regression: {regression}"))
+               if not regressions:
+                    self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+               elif options["fail_on_regression"]:
+                    raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}.")
+
+     def run(self, options):
+          dataset = {key: options[key] for key in ("users", "articles", "comments", "likes", "seed")}
+          generate_fake_data(
+               dataset["users"], dataset["articles"], dataset["comments"], dataset["likes"],
+               make_password(BENCH_PASSWORD), seed=dataset["seed"],
+          )
+          rebuild_derived_data(stdout=self.stdout)
+
+          self.client = WSGIClient()
+          self.rng = random.Random(options["seed"])
+          bench_user = User.objects.create_user(username="bench-user", password=BENCH_PASSWORD)
+          bench_user.groups.add(Group.objects.get(name="Moderators"))
+          self.credentials = {"username": bench_user.username, "password": BENCH_PASSWORD}
+          self.auth_headers = {"Authorization": f"Bearer {self.login()[1]['access']}"}
+          self.article_ids = list(Article.objects.values_list("id", flat=True))
+          self.pages = min(max(math.ceil(len(self.article_ids) / api_settings.PAGE_SIZE), 1), 5)
+          self.search_term = Article.objects.order_by("id").values_list("title", flat=True).first().split()[0]
+
+          scenarios = self.scenarios()
+          selected = options["scenario"] or list(scenarios)
+          unknown = set(selected) - set(scenarios)
+          if unknown:
+               raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(scenarios)}.")
+
+          results = {
+               "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "database": connection.vendor,
+                    "iterations": options["iterations"],
+                    "response_cache": options["response_cache"],
+                    "dataset": dataset,
+               },
+               "scenarios": {},
+          }
+          cache_timeout = settings.ARTICLE_CACHE_TIMEOUT if options["response_cache"] else 0
+          # Throttling would turn a benchmark run into a wall of 429s.
+          with override_settings(ARTICLE_CACHE_TIMEOUT=cache_timeout), mock.patch.object(APIView, "throttle_classes", []):
+               for name in selected:
+                    stats = run_scenario(scenarios[name], options["iterations"], warmup=options["warmup"])
+                    results["scenarios"][name] = stats
+                    self.stdout.write(
+                         f"{name:<20} {stats['throughput_rps']:>8} req/s  p50={stats['p50_ms']}ms "
+                         f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+                         f"queries={stats['queries_per_request']} errors={stats['errors']}"
+                    )
+          return results
+
+     def scenarios(self):
+          return {
+               "articles_list": lambda i: self.get("/api/articles/"),
+               "articles_filtered": lambda i: self.get("/api/articles/?category=Technology&ordering=-created_at"),
+               "articles_search": lambda i: self.get(f"/api/articles/?search={self.search_term}"),
+               "articles_page": lambda i: self.get(f"/api/articles/?page={i % self.pages + 1}"),
+               "article_detail": lambda i: self.get(f"/api/articles/{self.article()}/"),
+               "article_comments": lambda i: self.get(f"/api/articles/{self.article()}/comments/"),
+               "article_likes": lambda i: self.get(f"/api/articles/{self.article()}/likes/"),
+               "comment_create": self.create_comment,
+               "like_toggle": self.toggle_like,
+               "token_login": lambda i: self.login()[0],
+          }
+
+     def article(self):
+          return self.rng.choice(self.article_ids)
+
+     def get(self, path, headers=None):
+          return self.client.request("GET", path, headers=headers)[0]
+
+     def post(self, path, data, headers=None):
+          status, content = self.client.request("POST", path, body=json.dumps(data).encode(), headers=headers)
+          return status, json.loads(content) if content else None
+
+     def login(self):
+          return self.post("/api/token/", self.credentials)
+
+     def create_comment(self, i):
+          return self.post("/api/comments/", {"article": self.article(), "content": f"Benchmark comment {i}"}, self.auth_headers)[0]
+
+     def toggle_like(self, i):
+          # Even iterations like an article, odd ones remove that like again.
+          if i % 2 == 0:
+               status, body = self.post("/api/likes/", {"article": self.article()}, self.auth_headers)
+               self.like_id = body.get("id") if status == 201 else None
+               return status
+          if self.like_id is None:
+               return 400
+          return self.client.request("DELETE", f"/api/likes/{self.like_id}/", headers=self.auth_headers)[0]
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.views import APIView
+from api.models import Article
+from core.benchmark import ASGIClient, summarize
+from HERo_backend.asgi import application
+
+class Command(BaseCommand):
+     help = "Compares sync DRF and async article endpoints under ASGI with many concurrent slow clients"
+
+     def add_arguments(self, parser):
+          parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous clients.")
+          parser.add_argument("--rounds", type=int, default=4, help="Requests per client.")
+          parser.add_argument("--read-delay", type=float, default=0.05, help="Seconds each client takes to read a response.")
+
+     def handle(self, *args, **options):
+          article = Article.objects.order_by("-id").first()
+          suffixes = ["articles/"]
+          if article:
+               suffixes += [f"articles/{article.id}/", f"articles/{article.id}/comments/"]
+
+          # Response caching and throttling would hide the request handling being measured.
+          with override_settings(ARTICLE_CACHE_TIMEOUT=0), mock.patch.object(APIView, "throttle_classes", []):
+               for suffix in suffixes:
+                    for label, path in (("sync ", f"/api/{suffix}"), ("async", f"/api/async/{suffix}")):
+                         stats = asyncio.run(self.run_clients(path, options))
+                         self.stdout.write(
+                              f"{label} GET {path:<32} {stats['throughput_rps']:>8} req/s "
+                              f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+                              f"peak_threads={stats['peak_threads']} errors={stats['errors']}"
+                         )
+
+     async def run_clients(self, path, options):
+          client = ASGIClient(application, read_delay=options["read_delay"])
+          samples, errors, peak_threads = [], 0, threading.active_count()
+
+          async def run_client():
+               nonlocal errors, peak_threads
+               for _ in range(options["rounds"]):
+                    elapsed, status, _ = await client.timed("GET", path, headers={"Accept": "application/json"})
+                    samples.append(elapsed)
+                    errors += status != 200
+                    peak_threads = max(peak_threads, threading.active_count())
+
+          start = time.perf_counter()
+          await asyncio.gather(*(run_client() for _ in range(options["concurrency"])))
+          wall = time.perf_counter() - start
+
+          stats = summarize(samples)
+          stats.update(
+               throughput_rps=round(len(samples) / wall, 1),
+               peak_threads=peak_threads,
+               errors=errors,
+          )
+          return stats
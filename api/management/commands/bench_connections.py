@@ -0,0 +1,51 @@
+from unittest import mock
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from rest_framework.views import APIView
+from api.models import Article
+from core.benchmark import WSGIClient, summarize
+
+class Command(BaseCommand):
+     help = "Measures per-request latency with and without persistent database connections"
+
+     def add_arguments(self, parser):
+          parser.add_argument("--requests", type=int, default=200, help="Requests per mode.")
+          parser.add_argument("--path", help="Endpoint to request (default: the newest article's detail).")
+          parser.add_argument(
+               "--max-age", type=int, default=settings.DB_CONN_MAX_AGE or 600,
+               help="CONN_MAX_AGE used for the persistent-connection run.",
+          )
+
+     def handle(self, *args, **options):
+          path = options["path"]
+          if not path:
+               article = Article.objects.order_by("-id").first()
+               path = f"/api/articles/{article.id}/" if article else "/api/articles/"
+
+          database = connections["default"]
+          original_max_age = database.settings_dict["CONN_MAX_AGE"]
+          client = WSGIClient()
+          self.stdout.write(f"GET {path} x {options['requests']} ({database.vendor})")
+
+          # Response caching and throttling would hide the database cost being measured.
+          with override_settings(ARTICLE_CACHE_TIMEOUT=0), mock.patch.object(APIView, "throttle_classes", []):
+               try:
+                    for max_age in (0, options["max_age"]):
+                         database.close()
+                         database.settings_dict["CONN_MAX_AGE"] = max_age
+                         client.request("GET", path)
+                         samples = []
+                         for _ in range(options["requests"]):
+                              elapsed, status, _ = client.timed("GET", path)
+                              samples.append(elapsed)
+                         stats = summarize(samples)
+                         self.stdout.write(
+                              f"CONN_MAX_AGE={max_age:<5} status={status} "
+                              f"mean={stats['mean_ms']}ms p50={stats['p50_ms']}ms "
+                              f"p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms"
+                         )
+               finally:
+                    database.close()
+                    database.settings_dict["CONN_MAX_AGE"] = original_max_age
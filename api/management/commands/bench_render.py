@@ -0,0 +1,55 @@
+import gzip
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from api.views import ArticleViewSet
+from core.benchmark import summarize
+from core.compression import BROTLI_QUALITY, brotli
+from core.renderers import FastJSONRenderer
+
+class Command(BaseCommand):
+     help = "Measures JSON rendering and compression time for one page of serialized articles"
+
+     def add_arguments(self, parser):
+          parser.add_argument("--page-size", type=int, default=100, help="Articles on the rendered page.")
+          parser.add_argument("--rounds", type=int, default=200, help="Renders per renderer.")
+          parser.add_argument("--view", choices=["full", "summary"], default="full", help="Article representation to render.")
+
+     def handle(self, *args, **options):
+          data = self.page_data(options["page_size"], options["view"])
+          self.stdout.write(f"{len(data['results'])} articles ({options['view']}), {options['rounds']} rounds")
+
+          body = None
+          for name, renderer in (("JSONRenderer", JSONRenderer()), ("FastJSONRenderer", FastJSONRenderer())):
+               body, stats = self.measure(lambda: renderer.render(data, "application/json"), options["rounds"])
+               self.report(name, stats, f"{len(body)} bytes")
+
+          compressors = [("gzip", lambda: gzip.compress(body, compresslevel=6))]
+          if brotli is not None:
+               compressors.append(("brotli", lambda: brotli.compress(body, quality=BROTLI_QUALITY)))
+          for name, compress in compressors:
+               compressed, stats = self.measure(compress, options["rounds"])
+               self.report(name, stats, f"{len(compressed)} bytes ({len(compressed) / len(body):.0%})")
+
+     def page_data(self, page_size, view):
+          request = Request(RequestFactory().get("/api/articles/", {"view": view} if view == "full" else {}))
+          viewset = ArticleViewSet(request=request, action="list", format_kwarg=None, args=(), kwargs={})
+          articles = list(viewset.get_queryset()[:page_size])
+          if not articles:
+               raise CommandError("No articles to render; run seed_fake_data first.")
+          # Repeat what exists so the page always has page_size rows.
+          articles = (articles * (page_size // len(articles) + 1))[:page_size]
+          return {"count": page_size, "next": None, "previous": None, "results": viewset.get_serializer(articles, many=True).data}
+
+     def measure(self, function, rounds):
+          samples = []
+          for _ in range(rounds):
+               start = time.perf_counter()
+               result = function()
+               samples.append(time.perf_counter() - start)
+          return result, summarize(samples)
+
+     def report(self, name, stats, detail):
+          self.stdout.write(f"{name:<18} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms  {detail}")
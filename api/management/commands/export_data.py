@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from api.exports import EXPORTS, EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_stream
+
+class Command(BaseCommand):
+     help = "Streams all articles, comments or likes to a file (or stdout) as NDJSON or CSV"
+
+     def add_arguments(self, parser):
+          parser.add_argument("resource", choices=sorted(EXPORTS))
+          parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson", dest="file_format")
+          parser.add_argument("--output", help="File to write; defaults to stdout.")
+          parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per database round trip.")
+
+     def handle(self, *args, **options):
+          chunks = export_stream(options["resource"], options["file_format"], options["chunk_size"])
+          if not options["output"]:
+               # Write bytes straight through; the export is already encoded.
+               stream = getattr(self.stdout._out, "buffer", None)
+               for chunk in chunks:
+                    if stream is not None:
+                         stream.write(chunk)
+                    else:
+                         self.stdout.write(chunk.decode(), ending="")
+               if stream is not None:
+                    stream.flush()
+               return
+
+          written = 0
+          with open(options["output"], "wb") as file:
+               for chunk in chunks:
+                    written += file.write(chunk)
+          self.stdout.write(self.style.SUCCESS(f"Exported {options['resource']} to {options['output']} ({written} bytes)."))
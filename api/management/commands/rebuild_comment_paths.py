@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast, Concat, LPad
+from api.models import Comment, COMMENT_PATH_STEP
+
+class Command(BaseCommand):
+     help = "Backfills Comment.path and Comment.depth, one UPDATE per nesting level"
+
+     def handle(self, *args, **kwargs):
+          segment = LPad(Cast("id", CharField()), COMMENT_PATH_STEP, Value("0"))
+          Comment.objects.exclude(reply_to=None).update(path="", depth=0)
+          updated = Comment.objects.filter(reply_to=None).update(path=segment, depth=0)
+          total, depth = updated, 0
+
+          while updated:
+               parents = Comment.objects.filter(pk=OuterRef("reply_to_id"))
+               updated = Comment.objects.filter(reply_to__depth=depth, reply_to__reply_to__isnull=(depth == 0)).update(
+                    path=Concat(Subquery(parents.values("path")), segment),
+                    depth=depth + 1,
+               )
+               total += updated
+               depth += 1
+
+          self.stdout.write(self.style.SUCCESS(f"Rebuilt paths for {total} comments ({depth} levels)."))
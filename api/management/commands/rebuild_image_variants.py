@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.images import process_image
+from api.models import Article, UserProfile
+
+class Command(BaseCommand):
+     help = "Normalizes stored article images and profile pictures and generates their missing variants"
+
+     def handle(self, *args, **kwargs):
+          processed = 0
+          for model, field_name in ((Article, "image"), (UserProfile, "profile_pic")):
+               pks = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True}).values_list("pk", flat=True)
+               for pk in pks.iterator():
+                    process_image(model._meta.label, pk, field_name)
+                    processed += 1
+
+          self.stdout.write(self.style.SUCCESS(f"Checked {processed} images."))
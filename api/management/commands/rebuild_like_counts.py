@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from api.caching import invalidate_article_cache
+from api.models import Article, ArticleLike
+
+class Command(BaseCommand):
+     help = "Recomputes Article.like_count from the ArticleLike table"
+
+     def handle(self, *args, **kwargs):
+          like_counts = (
+               ArticleLike.objects.filter(article=OuterRef("pk"))
+               .order_by()
+               .values("article")
+               .annotate(total=Count("id"))
+               .values("total")
+          )
+          updated = Article.objects.update(like_count=Coalesce(Subquery(like_counts), 0))
+          invalidate_article_cache()
+
+          self.stdout.write(self.style.SUCCESS(f"Rebuilt like counts for {updated} articles."))
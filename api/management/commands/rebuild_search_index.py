@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from api.caching import invalidate_article_cache
+from api.models import Article
+from api.search import full_text_search_enabled, update_search_vectors
+
+class Command(BaseCommand):
+     help = "Recomputes Article.search_vector for every article"
+
+     def handle(self, *args, **kwargs):
+          if not full_text_search_enabled():
+               self.stdout.write(self.style.WARNING("Full-text search requires PostgreSQL; nothing to rebuild."))
+               return
+
+          updated = update_search_vectors(Article.objects.all())
+          invalidate_article_cache()
+
+          self.stdout.write(self.style.SUCCESS(f"Rebuilt search vectors for {updated} articles."))
@@ -3,12 +3,16 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.hashers import make_password
 from django.core.management import call_command
 from dotenv import load_dotenv
-import json
+from api.seeding import SEED_BATCH_SIZE, load_fixture, rebuild_derived_data
 
 class Command(BaseCommand):
      help = "Seeds the database with initial data"
 
-     def handle(self, *args, **kwargs):
+     def add_arguments(self, parser):
+          parser.add_argument("--fixture", default="seed_data.json", help="Fixture file to load.")
+          parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE, help="Rows per INSERT.")
+
+     def handle(self, *args, **options):
           load_dotenv(override=True)
           
           SEED_PASSWORD = os.getenv("SEED_PASSWORD")
@@ -16,17 +20,12 @@ class Command(BaseCommand):
           if not SEED_PASSWORD:
                raise PermissionError("You are not permitted to do this action.")
 
-          with open("seed_data.json", "r") as file:
-               data = json.load(file)
-
-          for entry in data:
-               if entry["model"] == "auth.user":
-                    entry["fields"]["password"] = make_password(SEED_PASSWORD)
-
-          with open("seed_data.json", "w") as file:
-               json.dump(data, file, indent=5)
+          # One PBKDF2 run shared by every seeded user.
+          password_hash = make_password(SEED_PASSWORD)
 
-          call_command("migrate")
-          call_command("loaddata", "seed_data.json")
+          call_command("migrate", stdout=self.stdout)
+          counts = load_fixture(options["fixture"], password_hash, batch_size=options["batch_size"])
+          rebuild_derived_data(stdout=self.stdout)
 
-          self.stdout.write(self.style.SUCCESS("Database seeded successfully!"))
\ No newline at end of file
+          loaded = ", ".join(f"{count} {model._meta.verbose_name_plural}" for model, count in counts.items())
+          self.stdout.write(self.style.SUCCESS(f"Database seeded successfully! Loaded {loaded}."))
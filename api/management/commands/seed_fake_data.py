@@ -0,0 +1,42 @@
+import os
+import time
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from dotenv import load_dotenv
+from api.seeding import SEED_BATCH_SIZE, generate_fake_data, rebuild_derived_data
+
+class Command(BaseCommand):
+     help = "Generates synthetic users, articles, comments and likes for load testing"
+
+     def add_arguments(self, parser):
+          parser.add_argument("--users", type=int, default=100)
+          parser.add_argument("--articles", type=int, default=1000)
+          parser.add_argument("--comments", type=int, default=5000)
+          parser.add_argument("--likes", type=int, default=10000)
+          parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data.")
+          parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE, help="Rows per INSERT.")
+
+     def handle(self, *args, **options):
+          load_dotenv(override=True)
+
+          SEED_PASSWORD = os.getenv("SEED_PASSWORD")
+
+          if not SEED_PASSWORD:
+               raise PermissionError("You are not permitted to do this action.")
+          if options["users"] < 1:
+               raise CommandError("At least one user is needed to author the generated data.")
+
+          start = time.perf_counter()
+          created = generate_fake_data(
+               options["users"],
+               options["articles"],
+               options["comments"],
+               options["likes"],
+               make_password(SEED_PASSWORD),
+               batch_size=options["batch_size"],
+               seed=options["seed"],
+          )
+          rebuild_derived_data(stdout=self.stdout)
+
+          summary = ", ".join(f"{count} {name}" for name, count in created.items())
+          self.stdout.write(self.style.SUCCESS(f"Generated {summary} in {time.perf_counter() - start:.1f}s."))
@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Concat, NullIf, Substr, Upper
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import MinLengthValidator, MaxLengthValidator, RegexValidator
 from taggit.managers import TaggableManager
 from django.utils.text import slugify
+from django.contrib.postgres.search import SearchVectorField
+from .search import SearchVectorIndex
 
 
 STATUS_CHOICES = [
@@ -48,6 +52,7 @@ class UserProfile(models.Model):
      profession = models.CharField(blank=True, max_length=150)
      bio = models.TextField(blank=True, max_length=1000)
      profile_pic = models.ImageField(upload_to='profile_pics', blank=True, null=True)
+     profile_pic_variants = models.JSONField(default=dict, blank=True, editable=False)
      birth_date = models.DateField(null=True, blank=True)
      created_at = models.DateTimeField(auto_now_add=True)
      updated_at = models.DateTimeField(auto_now=True)
@@ -59,6 +64,31 @@ class UserProfile(models.Model):
      def __str__(self):
           return f'{self.user.username} Profile'
 
+ARTICLE_EXCERPT_LENGTH = 200
+
+def article_excerpt():
+     """The description, or the start of the content when there is none, truncated in SQL."""
+     text = Coalesce(NullIf('description', models.Value('')), 'content')
+     return Substr(text, 1, ARTICLE_EXCERPT_LENGTH)
+
+def profile_id(user):
+     """The id of `user`'s UserProfile (None if anonymous or missing), looked up once per user object."""
+     if user is None or not user.is_authenticated:
+          return None
+     if not hasattr(user, '_profile_id'):
+          user._profile_id = UserProfile.objects.filter(user_id=user.pk).values_list('pk', flat=True).first()
+     return user._profile_id
+
+def article_liked_by(user):
+     """
+     Whether `user` liked the article, as one EXISTS per row served by the
+     (user, article) unique index alone.
+     """
+     user_profile_id = profile_id(user)
+     if user_profile_id is None:
+          return models.Value(False, output_field=models.BooleanField())
+     return models.Exists(ArticleLike.objects.filter(article=models.OuterRef('pk'), user_id=user_profile_id))
+
 class Article(models.Model):
      author = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='articles')
      title = models.CharField(
@@ -90,9 +120,22 @@ class Article(models.Model):
      )
      tags = TaggableManager()
      image = models.ImageField(upload_to="article_images/", blank=True, null=True)
+     image_variants = models.JSONField(default=dict, blank=True, editable=False)
      created_at = models.DateTimeField(auto_now_add=True)
      updated_at = models.DateTimeField(auto_now=True)
      status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='draft')
+     like_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+     search_vector = SearchVectorField(null=True, editable=False)
+
+     class Meta:
+          indexes = [
+               SearchVectorIndex(fields=['search_vector'], name='article_search_vector_idx'),
+               # Matches the UPPER(category) comparison of the case-insensitive category filter.
+               models.Index(Upper('category'), models.F('id').desc(), name='article_category_upper_idx'),
+               models.Index(fields=['status', '-id'], name='article_status_recent_idx'),
+               models.Index(fields=['author', '-id'], name='article_author_recent_idx'),
+               models.Index(fields=['-created_at', '-id'], name='article_created_idx'),
+          ]
 
      def __str__(self):
           return f'{self.title} by {self.author.username}'
@@ -102,6 +145,14 @@ class Article(models.Model):
                self.slug = slugify(self.title)
           super().save(*args, **kwargs)
 
+COMMENT_PATH_STEP = 10
+COMMENT_PATH_MAX_LENGTH = 1000
+# Deepest reply level whose path still fits in Comment.path (roots are depth 0).
+COMMENT_MAX_DEPTH = COMMENT_PATH_MAX_LENGTH // COMMENT_PATH_STEP - 1
+
+def comment_path_segment(pk):
+     return str(pk).zfill(COMMENT_PATH_STEP)
+
 class Comment(models.Model):
      author = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
      article = models.ForeignKey(Article, on_delete=models.CASCADE)
@@ -118,10 +169,107 @@ class Comment(models.Model):
           blank=True,
           related_name='replies',
      )
+     # Materialized path: the zero-padded ids of every ancestor followed by this
+     # comment's own id, so a whole subtree shares the same path prefix.
+     path = models.CharField(max_length=COMMENT_PATH_MAX_LENGTH, blank=True, default='', editable=False)
+     depth = models.PositiveIntegerField(default=0, editable=False)
+
+     class Meta:
+          indexes = [
+               models.Index(fields=['path'], name='comment_path_idx', opclasses=['varchar_pattern_ops']),
+               models.Index(fields=['article', 'created_at'], name='comment_article_created_idx'),
+               # Root comments of an article, in the order the comments endpoint pages them.
+               models.Index(fields=['article', 'created_at', 'id'], name='comment_root_idx', condition=models.Q(reply_to=None)),
+          ]
 
      def __str__(self):
           return f'{self.content} by {self.author.username}'
 
+     def save(self, *args, **kwargs):
+          parent_id = int(self.path[-2 * COMMENT_PATH_STEP:-COMMENT_PATH_STEP]) if self.depth else None
+          moved = not self.path or parent_id != self.reply_to_id
+          parent_path = self.reply_to.ensure_path() if moved and self.reply_to_id else ''
+          if moved and self.path and parent_path.startswith(self.path):
+               raise ValueError("A comment cannot reply to one of its own replies.")
+          if moved:
+               self.check_depth(parent_path)
+
+          super().save(*args, **kwargs)
+          if not moved:
+               return
+
+          old_path, old_depth = self.path, self.depth
+          self.path = parent_path + comment_path_segment(self.pk)
+          self.depth = len(self.path) // COMMENT_PATH_STEP - 1
+          if old_path:
+               Comment.objects.filter(path__startswith=old_path).update(
+                    path=Concat(models.Value(self.path), Substr('path', len(old_path) + 1)),
+                    depth=models.F('depth') + (self.depth - old_depth),
+               )
+          else:
+               Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+     def check_depth(self, parent_path):
+          """Rejects a move or reply that would nest the subtree deeper than COMMENT_MAX_DEPTH."""
+          depth = len(parent_path) // COMMENT_PATH_STEP
+          if self.path:
+               deepest = Comment.objects.filter(path__startswith=self.path).aggregate(models.Max('depth'))['depth__max']
+               depth += (deepest or self.depth) - self.depth
+          if depth > COMMENT_MAX_DEPTH:
+               raise DjangoValidationError(f"Replies can be nested at most {COMMENT_MAX_DEPTH} levels deep.")
+
+     def ensure_path(self):
+          """
+          The comment's path, computed (with its ancestors') and stored when it
+          predates the path index, so new replies to it stay in the thread.
+          """
+          if not self.path:
+               parent_path = self.reply_to.ensure_path() if self.reply_to_id else ''
+               self.path = parent_path + comment_path_segment(self.pk)
+               self.depth = len(self.path) // COMMENT_PATH_STEP - 1
+               Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+          return self.path
+
+     def descendants(self, max_depth=None):
+          replies = Comment.objects.filter(path__startswith=self.path).exclude(pk=self.pk)
+          if max_depth is not None:
+               replies = replies.filter(depth__lte=self.depth + max_depth)
+          return replies
+
+def attach_replies(comments, max_depth=None):
+     """
+     Loads the reply subtrees of the given comments with a single path-prefix
+     query and attaches them to their parents as `thread_replies`. `max_depth`
+     limits how many reply levels below each comment are loaded.
+     """
+     comments = list(comments)
+     by_id = {comment.id: comment for comment in comments}
+     subtrees = models.Q()
+     for comment in comments:
+          comment.thread_replies = []
+          if not comment.path:
+               continue
+          subtree = models.Q(path__startswith=comment.path, depth__gt=comment.depth)
+          if max_depth is not None:
+               subtree &= models.Q(depth__lte=comment.depth + max_depth)
+          subtrees |= subtree
+     if not subtrees:
+          return comments
+
+     replies = (
+          Comment.objects.filter(subtrees)
+          .select_related('author__user')
+          .order_by('depth', 'created_at', 'id')
+     )
+     for reply in replies:
+          parent = by_id.get(reply.reply_to_id)
+          if parent is None:
+               continue
+          reply.thread_replies = []
+          parent.thread_replies.append(reply)
+          by_id[reply.id] = reply
+     return comments
+
 class ArticleLike(models.Model):
      user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
      article = models.ForeignKey(Article, on_delete=models.CASCADE)
@@ -130,6 +278,9 @@ class ArticleLike(models.Model):
 
      class Meta:
           unique_together = ['user', 'article']
+          indexes = [
+               models.Index(fields=['article', 'created_at'], name='like_article_created_idx'),
+          ]
 
      def __str__(self):
           return f'{self.user.username} added a {self.reaction} to {self.article.title}'
\ No newline at end of file
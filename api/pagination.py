@@ -0,0 +1,49 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+     ordering = "-id"
+     keyset_fields = ["id", "created_at"]
+
+     def get_ordering(self, request, queryset, view):
+          ordering = super().get_ordering(request, queryset, view)
+          field = ordering[0].lstrip("-")
+          if field not in self.keyset_fields:
+               ordering = (self.ordering,)
+               field = self.ordering.lstrip("-")
+          if field == "id":
+               return ordering[:1]
+          direction = "-" if ordering[0].startswith("-") else ""
+          return (ordering[0], f"{direction}id")
+
+class CommentThreadCursorPagination(KeysetCursorPagination):
+     """Oldest-first, like the page-number mode of the article comment threads."""
+     ordering = ("created_at", "id")
+
+     def get_ordering(self, request, queryset, view):
+          return self.ordering
+
+class OptionalCursorPaginationMixin:
+     """
+     Keeps the default page-number pagination, but switches to keyset cursors
+     when the client asks for them with ?pagination=cursor (or sends a cursor).
+     """
+     cursor_pagination_class = KeysetCursorPagination
+
+     def get_cursor_pagination_class(self):
+          return self.cursor_pagination_class
+
+     def use_cursor_pagination(self):
+          params = self.request.query_params
+          return params.get("pagination") == "cursor" or "cursor" in params
+
+     @property
+     def paginator(self):
+          if not hasattr(self, "_paginator"):
+               if self.use_cursor_pagination():
+                    self._paginator = self.get_cursor_pagination_class()()
+               elif self.pagination_class is None:
+                    self._paginator = None
+               else:
+                    self._paginator = self.pagination_class()
+          return self._paginator
@@ -0,0 +1,65 @@
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Index, OuterRef, Subquery
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+from taggit.models import TaggedItem
+
+SEARCH_CONFIG = "english"
+
+
+def full_text_search_enabled():
+     return connection.vendor == "postgresql"
+
+class SearchVectorIndex(GinIndex):
+     """GIN index on PostgreSQL, plain index elsewhere so SQLite test databases still build."""
+
+     def create_sql(self, model, schema_editor, using="", **kwargs):
+          if schema_editor.connection.vendor != "postgresql":
+               return Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+          return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+def update_search_vectors(queryset):
+     """Rebuilds search_vector for the given articles in a single UPDATE."""
+     if not full_text_search_enabled():
+          return 0
+     tag_names = (
+          TaggedItem.objects.filter(
+               content_type=ContentType.objects.get_for_model(queryset.model),
+               object_id=OuterRef("pk"),
+          )
+          .order_by()
+          .values("object_id")
+          .annotate(names=StringAgg("tag__name", delimiter=" "))
+          .values("names")
+     )
+     vector = (
+          SearchVector("title", weight="A", config=SEARCH_CONFIG)
+          + SearchVector(Subquery(tag_names), weight="B", config=SEARCH_CONFIG)
+          + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+          + SearchVector("content", weight="D", config=SEARCH_CONFIG)
+     )
+     return queryset.update(search_vector=vector)
+
+class ArticleSearchFilter(SearchFilter):
+     """
+     Ranked full-text search over Article.search_vector on PostgreSQL.
+     Other databases fall back to DRF's icontains search on the view's search_fields.
+     """
+
+     def filter_queryset(self, request, queryset, view):
+          if not full_text_search_enabled():
+               return super().filter_queryset(request, queryset, view)
+
+          terms = self.get_search_terms(request)
+          if not terms:
+               return queryset
+
+          query = SearchQuery(" ".join(terms), config=SEARCH_CONFIG, search_type="websearch")
+          queryset = queryset.filter(search_vector=query)
+          if request.query_params.get(api_settings.ORDERING_PARAM):
+               return queryset
+          return queryset.annotate(rank=SearchRank(F("search_vector"), query)).order_by("-rank", "-id")
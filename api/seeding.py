@@ -0,0 +1,249 @@
+import json
+import random
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.text import slugify
+from taggit.models import Tag, TaggedItem
+from core.roles import DEFAULT_GROUPS, ensure_default_groups
+from .models import CATEGORY_CHOICES, STATUS_CHOICES, Article, ArticleLike, Comment, UserProfile
+
+SEED_BATCH_SIZE = 1000
+
+
+def iter_json_array(file, chunk_size=64 * 1024):
+     """Yields the items of a top-level JSON array without loading the whole file."""
+     decoder = json.JSONDecoder()
+     buffer, position, eof = "", 0, False
+
+     def fill():
+          nonlocal buffer, position, eof
+          chunk = file.read(chunk_size)
+          eof = not chunk
+          buffer = buffer[position:] + chunk
+          position = 0
+
+     def skip(characters):
+          nonlocal position
+          while True:
+               while position < len(buffer) and buffer[position] in characters:
+                    position += 1
+               if position < len(buffer) or eof:
+                    return
+               fill()
+
+     fill()
+     skip(" \t\r\n")
+     if buffer[position:position + 1] != "[":
+          raise ValueError("Fixture must be a JSON array.")
+     position += 1
+     while True:
+          skip(" \t\r\n,")
+          if position >= len(buffer) or buffer[position] == "]":
+               return
+          while True:
+               try:
+                    item, end = decoder.raw_decode(buffer, position)
+                    break
+               except json.JSONDecodeError:
+                    if eof:
+                         raise
+                    fill()
+          # An object cut off exactly at a number boundary decodes early; read on to be sure.
+          if end == len(buffer) and not eof:
+               fill()
+               continue
+          position = end
+          yield item
+
+class BulkInserter:
+     """
+     Buffers unsaved instances per model and writes them a batch at a time,
+     flushing a model's buffer when it fills up. Model signals do not fire.
+     Rows are written raw, like loaddata does: primary keys and
+     auto_now/auto_now_add timestamps are stored exactly as given, and rows
+     whose primary key already exists are updated instead of inserted.
+     """
+
+     def __init__(self, batch_size=SEED_BATCH_SIZE):
+          self.batch_size = batch_size
+          self.pending = {}
+          self.counts = {}
+
+     def add(self, instance):
+          model = type(instance)
+          batch = self.pending.setdefault(model, [])
+          batch.append(instance)
+          if len(batch) >= self.batch_size:
+               self.flush(model)
+
+     def flush(self, model=None):
+          for pending_model in [model] if model else list(self.pending):
+               batch = self.pending.pop(pending_model, [])
+               if batch:
+                    self.write(pending_model, batch)
+                    self.counts[pending_model] = self.counts.get(pending_model, 0) + len(batch)
+
+     def write(self, model, batch):
+          manager = model._base_manager
+          fields = model._meta.local_concrete_fields
+          existing = set(manager.filter(pk__in=[instance.pk for instance in batch]).values_list("pk", flat=True))
+          new = [instance for instance in batch if instance.pk not in existing]
+          if new:
+               manager._insert(new, fields=fields, raw=True)
+          if existing:
+               manager.bulk_update(
+                    [instance for instance in batch if instance.pk in existing],
+                    [field.name for field in fields if not field.primary_key],
+               )
+
+def load_fixture(path, password_hash, batch_size=SEED_BATCH_SIZE):
+     """
+     Streams a dumpdata-style fixture into the database with bulk inserts.
+     Every user gets `password_hash`. Objects must be ordered so that
+     referenced rows come first, as dumpdata writes them.
+     """
+     inserter = BulkInserter(batch_size)
+     m2m_rows = {}
+     current_model = None
+     with open(path, "r", encoding="utf-8") as file, transaction.atomic():
+          for entry in iter_json_array(file):
+               if entry["model"] == "auth.user":
+                    entry["fields"]["password"] = password_hash
+               for deserialized in serializers.deserialize("python", [entry]):
+                    instance = deserialized.object
+                    model = type(instance)
+                    if model is Article and not instance.slug:
+                         instance.slug = slugify(instance.title)
+                    if model is not current_model:
+                         inserter.flush()
+                         current_model = model
+                    inserter.add(instance)
+                    for field_name, values in (deserialized.m2m_data or {}).items():
+                         through = getattr(model, field_name).through
+                         source = model._meta.get_field(field_name).m2m_field_name()
+                         target = model._meta.get_field(field_name).m2m_reverse_field_name()
+                         m2m_rows.setdefault(through, []).extend(
+                              through(**{f"{source}_id": instance.pk, f"{target}_id": value}) for value in values
+                         )
+          inserter.flush()
+          for through, rows in m2m_rows.items():
+               through.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+          reset_sequences(list(inserter.counts))
+     return inserter.counts
+
+def reset_sequences(models):
+     # Rows were inserted with explicit primary keys; move sequences past them.
+     statements = connection.ops.sequence_reset_sql(no_style(), models)
+     with connection.cursor() as cursor:
+          for statement in statements:
+               cursor.execute(statement)
+
+def generate_fake_data(users, articles, comments, likes, password_hash, batch_size=SEED_BATCH_SIZE, seed=None):
+     """
+     Inserts synthetic users (with profiles and the Users group), tagged
+     articles, comments with one level of replies and unique likes.
+     """
+     from faker import Faker
+
+     fake = Faker()
+     rng = random.Random(seed)
+     if seed is not None:
+          Faker.seed(seed)
+
+     ensure_default_groups()
+     users_group = Group.objects.get(name=DEFAULT_GROUPS[0])
+     offset = (User.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+     with transaction.atomic():
+          user_rows = User.objects.bulk_create(
+               [User(username=f"{fake.user_name()}{offset + i}", password=password_hash) for i in range(users)],
+               batch_size=batch_size,
+          )
+          User.groups.through.objects.bulk_create(
+               [User.groups.through(user_id=user.pk, group_id=users_group.pk) for user in user_rows],
+               batch_size=batch_size,
+          )
+          profiles = UserProfile.objects.bulk_create(
+               [
+                    UserProfile(user=user, first_name=fake.first_name(), last_name=fake.last_name(), profession=fake.job()[:150], bio=fake.sentence())
+                    for user in user_rows
+               ],
+               batch_size=batch_size,
+          )
+
+          article_offset = (Article.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+          article_rows = []
+          for i in range(articles):
+               title = f"{fake.sentence(nb_words=6).rstrip('.')[:80]} {article_offset + i}"
+               article_rows.append(Article(
+                    author=rng.choice(profiles),
+                    title=title,
+                    slug=slugify(title),
+                    category=rng.choice(CATEGORY_CHOICES)[0],
+                    description=fake.sentence(nb_words=14),
+                    content="\n\n".join(fake.paragraphs(nb=3)),
+                    status=rng.choice(STATUS_CHOICES)[0],
+               ))
+          article_rows = Article.objects.bulk_create(article_rows, batch_size=batch_size)
+
+          tag_names = sorted({fake.word() for _ in range(50)})
+          Tag.objects.bulk_create([Tag(name=name, slug=slugify(name)) for name in tag_names], batch_size=batch_size, ignore_conflicts=True)
+          tags = list(Tag.objects.filter(name__in=tag_names))
+          content_type = ContentType.objects.get_for_model(Article)
+          TaggedItem.objects.bulk_create(
+               [
+                    TaggedItem(tag=tag, content_type=content_type, object_id=article.pk)
+                    for article in article_rows
+                    for tag in rng.sample(tags, min(3, len(tags)))
+               ],
+               batch_size=batch_size,
+          )
+
+          roots = Comment.objects.bulk_create(
+               [
+                    Comment(author=rng.choice(profiles), article=rng.choice(article_rows), content=fake.sentence())
+                    for _ in range(comments - comments // 3)
+               ],
+               batch_size=batch_size,
+          ) if article_rows else []
+          replies = []
+          for _ in range(comments // 3 if roots else 0):
+               parent = rng.choice(roots)
+               replies.append(Comment(author=rng.choice(profiles), article_id=parent.article_id, reply_to=parent, content=fake.sentence()))
+          Comment.objects.bulk_create(replies, batch_size=batch_size)
+
+          pairs = set()
+          likes = min(likes, len(profiles) * len(article_rows))
+          while len(pairs) < likes:
+               pairs.add((rng.choice(profiles).pk, rng.choice(article_rows).pk))
+          ArticleLike.objects.bulk_create(
+               [ArticleLike(user_id=user_id, article_id=article_id) for user_id, article_id in pairs],
+               batch_size=batch_size,
+          )
+
+     return {"users": len(user_rows), "articles": len(article_rows), "comments": len(roots) + len(replies), "likes": len(pairs)}
+
+def create_missing_tokens(batch_size=SEED_BATCH_SIZE):
+     """Gives every user without an auth token one, as the user post_save receiver would."""
+     from rest_framework.authtoken.models import Token
+
+     users = User.objects.filter(auth_token__isnull=True).values_list("pk", flat=True)
+     tokens = Token.objects.bulk_create(
+          [Token(user_id=user_id, key=Token.generate_key()) for user_id in users.iterator(chunk_size=batch_size)],
+          batch_size=batch_size,
+     )
+     return len(tokens)
+
+def rebuild_derived_data(**options):
+     """
+     Recomputes what bulk inserts skip: auth tokens, like counts, search
+     vectors and comment paths.
+     """
+     create_missing_tokens()
+     call_command("rebuild_like_counts", **options)
+     call_command("rebuild_search_index", **options)
+     call_command("rebuild_comment_paths", **options)
@@ -14,17 +14,24 @@ from rest_framework.serializers import (
 from taggit.serializers import TagListSerializerField, TaggitSerializer
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from core.validations import validate_password_strength
+from core.roles import get_user_groups
+from .fieldsets import DynamicFieldsMixin
+from .images import variant_urls
+from .models import ARTICLE_EXCERPT_LENGTH, profile_id
 
 
 class APITokenObtainPairSerializer(TokenObtainPairSerializer):
      @classmethod
      def get_token(cls, user):
           token = super().get_token(user)
+          groups = get_user_groups(user)
           token['username'] = user.username
+          token['groups'] = sorted(groups)
+          token['is_superuser'] = user.is_superuser
           token['role'] = "user"
-          if user.groups.filter(name='Moderators').exists():
+          if 'Moderators' in groups:
                token['role'] = "moderator"
-          elif user.groups.filter(name='Admins').exists():
+          elif 'Admins' in groups:
                token['role'] = 'admin'
           elif user.is_superuser:
                token['role'] = 'superuser'
@@ -84,19 +91,27 @@ class UserSerializer(ModelSerializer):
           return instance
 
 class UserProfileSerializer(ModelSerializer):
+     profile_pic_variants = SerializerMethodField()
+
      class Meta:
           model = UserProfile
           fields = [
                'id', 'user_id', 'username', 'first_name', 'last_name', 'profession', 'bio', 'profile_pic', 
-               'birth_date', 'created_at', 'updated_at'
+               'profile_pic_variants', 'birth_date', 'created_at', 'updated_at'
           ]
 
-class ArticleSerializer(TaggitSerializer, ModelSerializer):
+     def get_profile_pic_variants(self, obj):
+          return variant_urls(obj.profile_pic, obj.profile_pic_variants, self.context.get('request'))
+
+class ArticleSerializer(DynamicFieldsMixin, TaggitSerializer, ModelSerializer):
      tags = TagField(style={'base_template': 'input.html'})
      author = HiddenField(default=CurrentUserDefault())
      author_id = SerializerMethodField()
      author_username = SerializerMethodField()
+     excerpt = SerializerMethodField()
      likes = SerializerMethodField()
+     liked_by_me = SerializerMethodField()
+     image_variants = SerializerMethodField()
 
      class Meta:
           model = Article
@@ -108,14 +123,19 @@ class ArticleSerializer(TaggitSerializer, ModelSerializer):
                'title',
                'category',
                'description',
+               'excerpt',
                'content',
                'tags',
                'image',
+               'image_variants',
                'created_at',
                'updated_at',
                'likes',
+               'liked_by_me',
+               'like_count',
                'status'
                ]
+          read_only_fields = ['like_count']
 
      def validate(self, attrs):
           request = self.context.get('request')
@@ -124,13 +144,35 @@ class ArticleSerializer(TaggitSerializer, ModelSerializer):
           return attrs
 
      def get_author_id(self, obj):
-          return obj.author.id
+          return obj.author_id
 
      def get_author_username(self, obj):
           return obj.author.user.username
+
+     def get_excerpt(self, obj):
+          # Computed in SQL when the view annotates it, so content need not be loaded.
+          excerpt = getattr(obj, 'content_excerpt', None)
+          if excerpt is None:
+               excerpt = (obj.description or obj.content)[:ARTICLE_EXCERPT_LENGTH]
+          return excerpt
+
+     def get_image_variants(self, obj):
+          return variant_urls(obj.image, obj.image_variants, self.context.get('request'))
      
      def get_likes(self, obj):
-          return ArticleLike.objects.filter(article=obj).values_list("user_id", flat=True)
+          # Uses the page-wide prefetch from ArticleViewSet when present.
+          return [like.user_id for like in obj.articlelike_set.all()]
+
+     def get_liked_by_me(self, obj):
+          # ArticleViewSet annotates it; otherwise look it up for this article.
+          liked = getattr(obj, 'liked_by_me', None)
+          if liked is None:
+               request = self.context.get('request')
+               user_profile_id = profile_id(getattr(request, 'user', None))
+               if user_profile_id is None:
+                    return False
+               liked = obj.articlelike_set.filter(user_id=user_profile_id).exists()
+          return liked
 
 class CommentSerializer(ModelSerializer):
      author = HiddenField(default=CurrentUserDefault()) 
@@ -148,7 +190,7 @@ class CommentSerializer(ModelSerializer):
           return attrs
 
      def get_author_id(self, obj):
-          return obj.author.id
+          return obj.author_id
 
      def get_author_username(self, obj):
           return obj.author.user.username 
@@ -162,6 +204,13 @@ class CommentSerializer(ModelSerializer):
                validated_data['reply_to'] = reply_to
           return super().create(validated_data)
 
+class ThreadedCommentSerializer(CommentSerializer):
+     replies = SerializerMethodField()
+
+     def get_replies(self, obj):
+          replies = getattr(obj, 'thread_replies', [])
+          return ThreadedCommentSerializer(replies, many=True, context=self.context).data
+
 class ArticleLikeSerializer(ModelSerializer):
      user = HiddenField(default=CurrentUserDefault())
      user_id = SerializerMethodField()
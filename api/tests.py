@@ -0,0 +1,1231 @@
+import base64
+import csv
+import datetime
+import decimal
+import gzip
+import uuid
+import io
+import json
+import os
+import runpy
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from io import BytesIO
+from unittest import mock, skipIf, skipUnless
+from asgiref.sync import sync_to_async
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.validators import UniqueTogetherValidator
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from core.benchmark import compare_results
+from core.compression import brotli, compress_brotli, compress_sequence_brotli
+from core.renderers import FastJSONParser, FastJSONRenderer
+from core.throttling import FixedWindowAnonRateThrottle
+from .caching import ARTICLE_CACHE_VERSION_KEY
+from .exports import export_stream
+from .likes import set_article_like
+from .models import COMMENT_MAX_DEPTH, Article, ArticleLike, Comment, UserProfile
+from .search import full_text_search_enabled
+from .seeding import generate_fake_data, iter_json_array, load_fixture
+from .serializers import APITokenObtainPairSerializer
+
+
+class ArticleListQueryCountTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.users = [User.objects.create_user(username=f"reader{i}", password="x") for i in range(3)]
+          self.author = self.users[0].userprofile
+
+     def create_articles(self, count):
+          start = Article.objects.count()
+          for i in range(start, start + count):
+               article = Article.objects.create(
+                    author=self.author,
+                    title=f"Article number {i}",
+                    content="Some article content.",
+               )
+               article.tags.add(f"tag{i}", "common")
+               for user in self.users:
+                    ArticleLike.objects.create(user=user.userprofile, article=article)
+
+     def count_list_queries(self, path="/api/articles/"):
+          with CaptureQueriesContext(connection) as ctx:
+               response = self.client.get(path)
+          self.assertEqual(response.status_code, 200)
+          return len(ctx.captured_queries), response
+
+     def test_list_query_count_does_not_grow_with_page_size(self):
+          # The full view also serializes the prefetched likes and tags.
+          paths = ["/api/articles/", "/api/articles/?view=full"]
+          self.create_articles(2)
+          small_page_queries = [self.count_list_queries(path)[0] for path in paths]
+
+          self.create_articles(8)
+          for path, small in zip(paths, small_page_queries):
+               with self.subTest(path=path):
+                    full_page_queries, response = self.count_list_queries(path)
+                    self.assertEqual(len(response.data["results"]), 10)
+                    self.assertEqual(small, full_page_queries)
+
+     def test_list_serializes_prefetched_relations(self):
+          self.create_articles(1)
+          _, response = self.count_list_queries("/api/articles/?view=full")
+          article = response.data["results"][0]
+
+          self.assertEqual(article["author_username"], "reader0")
+          self.assertEqual(sorted(article["likes"]), sorted(u.userprofile.id for u in self.users))
+          self.assertEqual(sorted(article["tags"]), ["common", "tag0"])
+
+class ArticleLikeCountTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.user = User.objects.create_user(username="liker", password="x")
+          self.author = User.objects.create_user(username="writer", password="x").userprofile
+          self.article = Article.objects.create(author=self.author, title="Counted article", content="Content.")
+          self.client.force_authenticate(self.user)
+
+     def like_count(self):
+          self.article.refresh_from_db()
+          return self.article.like_count
+
+     def test_like_and_unlike_update_the_counter(self):
+          response = self.client.post("/api/likes/", {"article": self.article.id})
+          self.assertEqual(response.status_code, 201)
+          self.assertEqual(self.like_count(), 1)
+
+          self.assertEqual(self.client.delete(f"/api/likes/{response.data['id']}/").status_code, 204)
+          self.assertEqual(self.like_count(), 0)
+
+     def test_duplicate_like_is_rejected_without_counting(self):
+          self.client.post("/api/likes/", {"article": self.article.id})
+          self.assertEqual(self.client.post("/api/likes/", {"article": self.article.id}).status_code, 400)
+
+          # A concurrent duplicate gets past validation and fails on the unique constraint.
+          with mock.patch.object(UniqueTogetherValidator, "__call__", return_value=None):
+               response = self.client.post("/api/likes/", {"article": self.article.id})
+          self.assertEqual(response.status_code, 400)
+          self.assertEqual(self.like_count(), 1)
+
+     def test_deletes_outside_the_api_decrement_the_counter(self):
+          others = [User.objects.create_user(username=f"other{i}", password="x") for i in range(3)]
+          for user in others:
+               ArticleLike.objects.create(user=user.userprofile, article=self.article)
+          self.assertEqual(self.like_count(), 3)
+
+          ArticleLike.objects.filter(user=others[0].userprofile).delete()
+          self.assertEqual(self.like_count(), 2)
+          others[1].delete()
+          self.assertEqual(self.like_count(), 1)
+
+     def test_deleting_a_profile_uncounts_its_likes_per_article(self):
+          other = Article.objects.create(author=self.author, title="Second article", content="Content.")
+          fans = [User.objects.create_user(username=f"fan{i}", password="x").userprofile for i in range(2)]
+          for article in (self.article, other):
+               for fan in fans:
+                    ArticleLike.objects.create(user=fan, article=article)
+
+          with CaptureQueriesContext(connection) as context:
+               fans[0].delete()
+          updates = [query for query in context.captured_queries if query["sql"].startswith('UPDATE "api_article"')]
+          self.assertEqual(len(updates), 1)
+          self.assertEqual(self.like_count(), 1)
+          other.refresh_from_db()
+          self.assertEqual(other.like_count, 1)
+
+     def test_article_delete_query_count_does_not_grow_with_likes(self):
+          def count_delete(likes):
+               article = Article.objects.create(author=self.author, title=f"Liked {likes} times", content="Content.")
+               for i in range(likes):
+                    fan = User.objects.create_user(username=f"fan{likes}-{i}", password="x").userprofile
+                    ArticleLike.objects.create(user=fan, article=article)
+               with CaptureQueriesContext(connection) as context:
+                    article.delete()
+               return len(context)
+
+          # The first delete also looks up (and caches) the taggit content type.
+          count_delete(0)
+          self.assertEqual(count_delete(2), count_delete(50))
+          self.assertFalse(ArticleLike.objects.filter(article__title__startswith="Liked").exists())
+
+     def test_rebuild_like_counts_repairs_drift(self):
+          ArticleLike.objects.create(user=self.user.userprofile, article=self.article)
+          Article.objects.filter(pk=self.article.pk).update(like_count=7)
+          call_command("rebuild_like_counts", stdout=io.StringIO())
+          self.assertEqual(self.like_count(), 1)
+
+class ArticleSearchTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.author = User.objects.create_user(username="writer", password="x").userprofile
+          self.by_title = Article.objects.create(author=self.author, title="Gardening for beginners", content="Soil and seeds.")
+          self.by_content = Article.objects.create(author=self.author, title="Weekend notes", content="Some gardening tips inside.")
+          self.by_tag = Article.objects.create(author=self.author, title="Spring outdoors", content="Nothing else here.")
+          self.by_tag.tags.add("gardening", "spring")
+          self.unrelated = Article.objects.create(author=self.author, title="Cooking pasta", content="Boil the water.")
+
+     def search(self, query):
+          response = self.client.get("/api/articles/", {"search": query})
+          self.assertEqual(response.status_code, 200)
+          return [article["id"] for article in response.data["results"]]
+
+     @skipIf(full_text_search_enabled(), "icontains fallback is only used without PostgreSQL")
+     def test_fallback_matches_title_content_and_tags(self):
+          self.assertEqual(
+               sorted(self.search("gardening")),
+               sorted([self.by_title.id, self.by_content.id, self.by_tag.id]),
+          )
+          self.assertEqual(self.search("pasta"), [self.unrelated.id])
+
+     def test_search_vector_is_updated_on_save_and_tag_change(self):
+          with mock.patch("api.search.update_search_vectors") as update:
+               self.by_title.save()
+               self.by_title.tags.add("soil")
+               self.by_title.tags.remove("soil")
+          self.assertEqual(update.call_count, 3)
+          for call in update.call_args_list:
+               self.assertEqual(list(call.args[0].values_list("pk", flat=True)), [self.by_title.pk])
+
+     @skipIf(full_text_search_enabled(), "PostgreSQL rebuilds the vectors")
+     def test_rebuild_search_index_needs_postgresql(self):
+          out = io.StringIO()
+          call_command("rebuild_search_index", stdout=out)
+          self.assertIn("requires PostgreSQL", out.getvalue())
+
+     @skipUnless(full_text_search_enabled(), "full-text search requires PostgreSQL")
+     def test_full_text_search_ranks_title_matches_first(self):
+          ids = self.search("gardening")
+          self.assertEqual(ids[0], self.by_title.id)
+          self.assertEqual(set(ids), {self.by_title.id, self.by_content.id, self.by_tag.id})
+          self.assertEqual(self.search("gardens"), ids)
+
+     @skipUnless(full_text_search_enabled(), "full-text search requires PostgreSQL")
+     def test_rebuild_search_index_restores_vectors(self):
+          Article.objects.update(search_vector=None)
+          self.assertEqual(self.search("gardening"), [])
+          call_command("rebuild_search_index", stdout=io.StringIO())
+          self.assertEqual(self.search("pasta"), [self.unrelated.id])
+          self.assertIn(self.by_tag.id, self.search("spring"))
+
+class CursorPaginationTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          author = User.objects.create_user(username="writer", password="x").userprofile
+          self.articles = [
+               Article.objects.create(author=author, title=f"Article number {i}", content="Some article content.")
+               for i in range(15)
+          ]
+
+     def collect_pages(self, url):
+          ids = []
+          while url:
+               response = self.client.get(url)
+               self.assertEqual(response.status_code, 200)
+               self.assertNotIn("count", response.data)
+               ids += [article["id"] for article in response.data["results"]]
+               url = response.data["next"]
+          return ids
+
+     def test_cursor_mode_walks_every_article_once(self):
+          ids = self.collect_pages("/api/articles/?pagination=cursor")
+          self.assertEqual(ids, sorted((a.id for a in self.articles), reverse=True))
+
+     def test_cursor_mode_keeps_supported_ordering(self):
+          ids = self.collect_pages("/api/articles/?pagination=cursor&ordering=created_at")
+          self.assertEqual(ids, [a.id for a in self.articles])
+
+     def test_page_number_mode_is_default(self):
+          response = self.client.get("/api/articles/")
+          self.assertEqual(response.data["count"], 15)
+
+     def test_comment_threads_keep_their_order_in_both_modes(self):
+          article = self.articles[0]
+          for text in ["r1", "r2", "r3"]:
+               Comment.objects.create(author=article.author, article=article, content=text)
+          url = f"/api/articles/{article.id}/comments/"
+
+          page_mode = [comment["content"] for comment in self.client.get(url).data["results"]]
+          response = self.client.get(url + "?pagination=cursor")
+          cursor_mode = [comment["content"] for comment in response.data["results"]]
+          self.assertEqual(page_mode, ["r1", "r2", "r3"])
+          self.assertEqual(cursor_mode, page_mode)
+
+class RoleCacheTests(APITestCase):
+     def setUp(self):
+          self.user = User.objects.create_user(username="commenter", password="x")
+          author = User.objects.create_user(username="writer", password="x").userprofile
+          self.article = Article.objects.create(author=author, title="Cached roles", content="Some article content.")
+          cache.clear()
+
+     def post_comment(self):
+          self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+          return self.client.post(
+               "/api/comments/", {"article": self.article.id, "content": "Nice article"}, format="json"
+          )
+
+     def test_group_names_load_once_then_come_from_cache(self):
+          with CaptureQueriesContext(connection) as ctx:
+               self.assertEqual(self.post_comment().status_code, 201)
+          self.assertEqual(sum("auth_user_groups" in q["sql"] for q in ctx.captured_queries), 1)
+
+          with CaptureQueriesContext(connection) as ctx:
+               self.assertEqual(self.post_comment().status_code, 201)
+          self.assertFalse(any("auth_user_groups" in q["sql"] for q in ctx.captured_queries))
+
+     def test_membership_change_invalidates_cache(self):
+          self.assertEqual(self.post_comment().status_code, 201)
+          self.user.groups.clear()
+          self.assertEqual(self.post_comment().status_code, 403)
+          self.user.groups.add(Group.objects.get(name="Users"))
+          self.assertEqual(self.post_comment().status_code, 201)
+
+@override_settings(JWT_STATELESS_AUTH=True)
+class StatelessJWTTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.moderator = User.objects.create_user(username="moderator", password="x")
+          self.moderator.groups.add(Group.objects.get(name="Moderators"))
+          self.reader = User.objects.create_user(username="reader", password="x")
+
+     def authenticate(self, user):
+          access = APITokenObtainPairSerializer.get_token(user).access_token
+          self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+     def post_article(self):
+          return self.client.post(
+               "/api/articles/",
+               {"title": "Stateless article", "content": "Some article content.", "tags": ["jwt"]},
+               format="json",
+          )
+
+     def test_denied_request_runs_no_queries(self):
+          self.authenticate(self.reader)
+          with self.assertNumQueries(0):
+               self.assertEqual(self.post_article().status_code, 403)
+
+     def test_allowed_request_skips_group_queries(self):
+          self.authenticate(self.moderator)
+          with CaptureQueriesContext(connection) as ctx:
+               self.assertEqual(self.post_article().status_code, 201)
+          self.assertFalse(any("auth_user_groups" in q["sql"] for q in ctx.captured_queries))
+
+     def load_settings(self, **env):
+          with mock.patch.dict(os.environ, env):
+               return runpy.run_module("HERo_backend.settings")
+
+     def test_stateless_auth_defaults_to_short_access_tokens(self):
+          with mock.patch.dict(os.environ):
+               os.environ.pop("JWT_ACCESS_TOKEN_MINUTES", None)
+               stateless = self.load_settings(JWT_STATELESS_AUTH="True")
+          self.assertEqual(stateless["SIMPLE_JWT"]["ACCESS_TOKEN_LIFETIME"], datetime.timedelta(minutes=10))
+
+     def test_stateless_auth_refuses_long_access_tokens(self):
+          with self.assertRaisesMessage(ImproperlyConfigured, "JWT_ACCESS_TOKEN_MINUTES"):
+               self.load_settings(JWT_STATELESS_AUTH="True", JWT_ACCESS_TOKEN_MINUTES=str(28 * 24 * 60))
+
+class HeaderDispatchAuthenticationTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.user = User.objects.create_user(username="basicuser", password="S3cret!1234")
+          self.user.groups.add(Group.objects.get(name="Moderators"))
+
+     def get_with_basic(self, password):
+          credentials = base64.b64encode(f"basicuser:{password}".encode()).decode()
+          self.client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+          return self.client.get(f"/api/users/{self.user.pk}/")
+
+     def test_repeated_basic_auth_hashes_password_once(self):
+          with mock.patch("rest_framework.authentication.authenticate", wraps=authenticate) as check:
+               self.assertEqual(self.get_with_basic("S3cret!1234").status_code, 200)
+               self.assertEqual(self.get_with_basic("S3cret!1234").status_code, 200)
+          self.assertEqual(check.call_count, 1)
+
+     def test_cached_basic_auth_rejects_wrong_or_changed_password(self):
+          self.assertEqual(self.get_with_basic("S3cret!1234").status_code, 200)
+          self.assertEqual(self.get_with_basic("wrong").status_code, 403)
+
+          self.user.set_password("N3wSecret!5678")
+          self.user.save()
+          self.assertEqual(self.get_with_basic("S3cret!1234").status_code, 403)
+
+     def test_bearer_header_only_runs_jwt(self):
+          access = APITokenObtainPairSerializer.get_token(self.user).access_token
+          self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+          with mock.patch("rest_framework.authentication.authenticate") as check:
+               self.assertEqual(self.client.get(f"/api/users/{self.user.pk}/").status_code, 200)
+          check.assert_not_called()
+
+     def test_unknown_scheme_falls_back_to_the_session(self):
+          self.client.force_login(self.user)
+          self.client.credentials(HTTP_AUTHORIZATION="Digest username=\"basicuser\"")
+          response = self.client.post(
+               "/api/articles/",
+               {"title": "Session article", "content": "Some article content.", "tags": ["session"]},
+               format="json",
+          )
+          self.assertEqual(response.status_code, 201)
+
+class ThreadedCommentsTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.author = User.objects.create_user(username="writer", password="x").userprofile
+          self.article = Article.objects.create(author=self.author, title="Threaded comments", content="Some article content.")
+
+     def comment(self, content, reply_to=None):
+          return Comment.objects.create(author=self.author, article=self.article, content=content, reply_to=reply_to)
+
+     def test_replies_are_nested_under_paginated_roots(self):
+          roots = [self.comment(f"root {i}") for i in range(12)]
+          reply = self.comment("reply", reply_to=roots[11])
+          self.comment("nested reply", reply_to=reply)
+
+          response = self.client.get(f"/api/articles/{self.article.id}/comments/?page=2")
+
+          self.assertEqual(response.data["count"], 12)
+          last_root = response.data["results"][-1]
+          self.assertEqual(last_root["id"], roots[11].id)
+          self.assertEqual(last_root["replies"][0]["content"], "reply")
+          self.assertEqual(last_root["replies"][0]["replies"][0]["content"], "nested reply")
+
+          response = self.client.get(f"/api/articles/{self.article.id}/comments/?page=2&depth=1")
+          self.assertEqual(response.data["results"][-1]["replies"][0]["replies"], [])
+
+     def test_query_count_does_not_grow_with_comment_count(self):
+          def count_queries():
+               with CaptureQueriesContext(connection) as ctx:
+                    self.client.get(f"/api/articles/{self.article.id}/comments/")
+               return len(ctx.captured_queries)
+
+          root = self.comment("root")
+          self.comment("reply", reply_to=root)
+          baseline = count_queries()
+
+          for i in range(9):
+               parent = self.comment(f"root {i}")
+               for j in range(3):
+                    self.comment(f"reply {j}", reply_to=parent)
+          self.assertEqual(count_queries(), baseline)
+
+     def test_reparenting_moves_the_whole_subtree(self):
+          first, second = self.comment("first"), self.comment("second")
+          reply = self.comment("reply", reply_to=first)
+          nested = self.comment("nested", reply_to=reply)
+
+          reply.reply_to = second
+          reply.save()
+          nested.refresh_from_db()
+          self.assertTrue(nested.path.startswith(second.path))
+          self.assertEqual((reply.depth, nested.depth), (1, 2))
+          self.assertEqual(list(first.descendants()), [])
+          self.assertEqual(set(second.descendants()), {reply, nested})
+
+          reply.reply_to = None
+          reply.save()
+          nested.refresh_from_db()
+          self.assertEqual((reply.depth, nested.depth), (0, 1))
+          self.assertTrue(nested.path.startswith(reply.path))
+
+     def test_a_comment_cannot_reply_to_its_own_subtree(self):
+          root = self.comment("root")
+          reply = self.comment("reply", reply_to=root)
+          root.reply_to = reply
+          with self.assertRaises(ValueError):
+               root.save()
+
+     def test_descendants_can_be_limited_by_depth(self):
+          root = self.comment("root")
+          child = self.comment("child", reply_to=root)
+          grandchild = self.comment("grandchild", reply_to=child)
+          self.assertEqual(set(root.descendants()), {child, grandchild})
+          self.assertEqual(list(root.descendants(max_depth=1)), [child])
+
+     def test_nesting_deeper_than_the_path_allows_is_rejected(self):
+          parent = self.comment("root")
+          for i in range(COMMENT_MAX_DEPTH):
+               parent = self.comment(f"level {i + 1}", reply_to=parent)
+          self.assertEqual(parent.depth, COMMENT_MAX_DEPTH)
+
+          self.client.force_authenticate(self.author.user)
+          response = self.client.post("/api/comments/", {"article": self.article.id, "content": "too deep", "reply_to": parent.id})
+          self.assertEqual(response.status_code, 400)
+          self.assertFalse(Comment.objects.filter(content="too deep").exists())
+
+     def test_replies_to_comments_without_a_path_join_the_thread(self):
+          root = self.comment("root")
+          reply = self.comment("reply", reply_to=root)
+          Comment.objects.update(path="", depth=0)
+          reply.refresh_from_db()
+
+          self.comment("new reply", reply_to=reply)
+          thread = self.client.get(f"/api/articles/{self.article.id}/comments/").data["results"][0]
+          self.assertEqual(thread["replies"][0]["replies"][0]["content"], "new reply")
+
+     def test_rebuild_comment_paths_restores_paths_and_depths(self):
+          root = self.comment("root")
+          reply = self.comment("reply", reply_to=root)
+          nested = self.comment("nested", reply_to=reply)
+          expected = list(Comment.objects.order_by("id").values_list("path", "depth"))
+
+          Comment.objects.update(path="", depth=0)
+          call_command("rebuild_comment_paths", stdout=io.StringIO())
+          self.assertEqual(list(Comment.objects.order_by("id").values_list("path", "depth")), expected)
+          self.assertEqual(set(root.descendants()), {reply, nested})
+
+class ArticleResponseCacheTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.author = User.objects.create_user(username="writer", password="x").userprofile
+          self.article = Article.objects.create(author=self.author, title="Cached article", content="Some article content.")
+
+     def test_anonymous_list_is_served_from_cache(self):
+          self.client.get("/api/articles/?ordering=title&page=1")
+          with self.assertNumQueries(0):
+               response = self.client.get("/api/articles/?page=1&ordering=title")
+          self.assertEqual(response.data["count"], 1)
+
+     def test_etag_returns_not_modified(self):
+          etag = self.client.get(f"/api/articles/{self.article.id}/")["ETag"]
+          response = self.client.get(f"/api/articles/{self.article.id}/", HTTP_IF_NONE_MATCH=etag)
+          self.assertEqual(response.status_code, 304)
+
+     def test_writes_invalidate_cached_responses(self):
+          etag = self.client.get("/api/articles/")["ETag"]
+          with self.captureOnCommitCallbacks(execute=True):
+               ArticleLike.objects.create(user=self.author, article=self.article)
+
+          response = self.client.get("/api/articles/?view=full", HTTP_IF_NONE_MATCH=etag)
+          self.assertEqual(response.status_code, 200)
+          self.assertEqual(len(response.data["results"][0]["likes"]), 1)
+
+     def test_cascading_delete_invalidates_once(self):
+          for i in range(5):
+               fan = User.objects.create_user(username=f"fan{i}", password="x").userprofile
+               ArticleLike.objects.create(user=fan, article=self.article)
+
+          with mock.patch("api.caching.cache.set", wraps=cache.set) as cache_set:
+               with self.captureOnCommitCallbacks(execute=True):
+                    self.article.delete()
+          version_writes = [call for call in cache_set.call_args_list if call.args[0] == ARTICLE_CACHE_VERSION_KEY]
+          # Once when the rows change and once more after the commit.
+          self.assertEqual(len(version_writes), 2)
+
+class FixedWindowThrottleTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+
+     @mock.patch.object(FixedWindowAnonRateThrottle, "THROTTLE_RATES", {"anon": "2/min", "user": None})
+     def test_requests_over_the_window_limit_are_throttled(self):
+          statuses = [self.client.get("/api/comments/").status_code for _ in range(3)]
+          self.assertEqual(statuses, [200, 200, 429])
+
+     @mock.patch.object(FixedWindowAnonRateThrottle, "THROTTLE_RATES", {"anon": "2/day", "user": None})
+     def test_window_outlives_the_default_cache_timeout(self):
+          start = 86400 * 20000 + 60
+          with mock.patch.object(FixedWindowAnonRateThrottle, "timer", mock.Mock(return_value=start)), \
+                    mock.patch("time.time", return_value=start):
+               self.assertEqual([self.client.get("/api/comments/").status_code for _ in range(2)], [200, 200])
+          # Ten idle minutes later, well past the cache's 300s default timeout.
+          later = start + 600
+          with mock.patch.object(FixedWindowAnonRateThrottle, "timer", mock.Mock(return_value=later)), \
+                    mock.patch("time.time", return_value=later):
+               self.assertEqual(self.client.get("/api/comments/").status_code, 429)
+
+class UserProvisioningTests(APITestCase):
+     credentials = {"username": "newuser", "password": "Str0ng!1234"}
+
+     def setUp(self):
+          cache.clear()
+
+     def test_register_provisions_user_in_constant_queries(self):
+          # username check, user, savepoint, group membership, profile, token, release, outstanding JWT
+          with self.assertNumQueries(8):
+               response = self.client.post("/api/auth/register/", self.credentials, format="json")
+          self.assertEqual(response.status_code, 200)
+
+          user = User.objects.get(username="newuser")
+          self.assertEqual(list(user.groups.values_list("name", flat=True)), ["Users"])
+          self.assertEqual(user.auth_token.key, response.data["token"])
+          self.assertTrue(UserProfile.objects.filter(user=user).exists())
+
+     def test_login_does_not_reprovision_user(self):
+          User.objects.create_user(**self.credentials)
+          # user, token, outstanding JWT, session lookup/insert/update (+ savepoints), last_login
+          with self.assertNumQueries(11):
+               response = self.client.post("/api/auth/login/", self.credentials, format="json")
+          self.assertEqual(response.status_code, 200)
+
+class AsyncReadEndpointTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          user = User.objects.create_user(username="writer", password="x")
+          self.article = Article.objects.create(author=user.userprofile, title="Async article", content="Some article content.")
+          self.article.tags.add("async")
+          ArticleLike.objects.create(user=user.userprofile, article=self.article)
+          root = Comment.objects.create(author=user.userprofile, article=self.article, content="root")
+          Comment.objects.create(author=user.userprofile, article=self.article, content="reply", reply_to=root)
+
+     async def test_async_endpoints_match_sync_responses(self):
+          for path in ["articles/", f"articles/{self.article.id}/", f"articles/{self.article.id}/comments/", f"articles/{self.article.id}/likes/"]:
+               async_response = await self.async_client.get(f"/api/async/{path}")
+               sync_response = await sync_to_async(self.client.get)(f"/api/{path}", HTTP_ACCEPT="application/json")
+               self.assertEqual(async_response.status_code, 200)
+               self.assertEqual(async_response.json(), sync_response.json())
+
+     async def test_async_detail_returns_not_found(self):
+          response = await self.async_client.get("/api/async/articles/0/")
+          self.assertEqual(response.status_code, 404)
+
+class ImagePipelineTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.media_root = tempfile.mkdtemp()
+          self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+          settings_override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_PROCESSING_ASYNC=False, IMAGE_MAX_DIMENSION=800)
+          settings_override.enable()
+          self.addCleanup(settings_override.disable)
+          self.user = User.objects.create_user(username="photographer", password="x")
+          self.user.groups.add(Group.objects.get(name="Moderators"))
+
+     def upload(self, size=(1600, 1200)):
+          exif = Image.Exif()
+          exif[0x010F] = "Camera maker"
+          buffer = BytesIO()
+          Image.new("RGB", size, "red").save(buffer, format="JPEG", exif=exif)
+          return SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+     def test_upload_is_normalized_and_variants_are_exposed(self):
+          self.client.force_authenticate(self.user)
+          with self.captureOnCommitCallbacks() as callbacks:
+               response = self.client.post("/api/articles/", {
+                    "title": "Photo article",
+                    "content": "Some article content.",
+                    "tags": ["photos"],
+                    "image": self.upload(),
+               }, format="multipart")
+          self.assertEqual(response.status_code, 201)
+          self.assertEqual(response.data["image_variants"], {})
+          article = Article.objects.get(pk=response.data["id"])
+          # The request only stored the upload; decoding and resizing are left to the job.
+          with Image.open(article.image.path) as original:
+               self.assertEqual(original.size, (1600, 1200))
+          for callback in callbacks:
+               callback()
+
+          # The URL returned on create still points at the stored original.
+          self.assertEqual(self.client.get(response.data["image"]).status_code, 200)
+          article.refresh_from_db()
+          self.assertTrue(response.data["image"].endswith(article.image.url))
+          with Image.open(article.image.path) as original:
+               self.assertEqual(original.size, (800, 600))
+               self.assertEqual(len(original.getexif()), 0)
+          with Image.open(article.image.storage.path(article.image_variants["files"]["thumbnail"]["webp"])) as thumbnail:
+               self.assertEqual((thumbnail.format, thumbnail.size), ("WEBP", (320, 240)))
+
+          variants = self.client.get(f"/api/articles/{article.id}/").data["image_variants"]
+          self.assertEqual(set(variants), {"thumbnail", "medium"})
+          self.assertTrue(variants["medium"]["jpeg"].startswith("http://testserver/media/article_images/variants/"))
+
+     def test_unwritable_formats_get_the_extension_they_are_stored_in(self):
+          buffer = BytesIO()
+          Image.new("RGB", (40, 30), "blue").save(buffer, format="TIFF")
+          profile = self.user.userprofile
+          with self.captureOnCommitCallbacks(execute=True):
+               profile.profile_pic = SimpleUploadedFile("scan.tiff", buffer.getvalue(), content_type="image/tiff")
+               profile.save()
+          name = profile.profile_pic.name
+
+          profile.refresh_from_db()
+          self.assertEqual(profile.profile_pic.name, name)
+          self.assertRegex(name, r"^profile_pics/scan\.[0-9a-f]{12}\.jpg$")
+          with Image.open(profile.profile_pic.path) as original:
+               self.assertEqual((original.format, original.size), ("JPEG", (40, 30)))
+
+     def test_previously_stored_originals_are_normalized_by_the_job(self):
+          profile = self.user.userprofile
+          name = default_storage.save("profile_pics/legacy.jpg", self.upload())
+          UserProfile.objects.filter(pk=profile.pk).update(profile_pic=name)
+          profile.refresh_from_db()
+          with self.captureOnCommitCallbacks(execute=True):
+               profile.save()
+
+          profile.refresh_from_db()
+          self.assertEqual(profile.profile_pic.name, name)
+          self.assertEqual(profile.profile_pic_variants["source"], name)
+          with Image.open(profile.profile_pic.path) as original:
+               self.assertEqual((original.size, len(original.getexif())), ((800, 600), 0))
+
+     def test_replacing_profile_pic_removes_old_variants(self):
+          profile = self.user.userprofile
+          with self.captureOnCommitCallbacks(execute=True):
+               profile.profile_pic = self.upload(size=(400, 400))
+               profile.save()
+          profile.refresh_from_db()
+          old_variants = [name for names in profile.profile_pic_variants["files"].values() for name in names.values()]
+
+          with self.captureOnCommitCallbacks(execute=True):
+               profile.profile_pic = None
+               profile.save()
+          profile.refresh_from_db()
+          self.assertEqual(profile.profile_pic_variants, {})
+          self.assertFalse(any(profile.profile_pic.storage.exists(name) for name in old_variants))
+
+class MediaServingTests(APITestCase):
+     def setUp(self):
+          self.media_root = tempfile.mkdtemp()
+          self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+          settings_override = override_settings(MEDIA_ROOT=self.media_root)
+          settings_override.enable()
+          self.addCleanup(settings_override.disable)
+          self.name = default_storage.save("article_images/notes.txt", ContentFile(b"0123456789"))
+
+     def get(self, **headers):
+          return self.client.get(f"/media/{self.name}", **headers)
+
+     def test_hashed_file_is_served_with_immutable_caching(self):
+          self.assertRegex(self.name, r"^article_images/notes\.[0-9a-f]{12}\.txt$")
+          response = self.get()
+          self.assertEqual(response.status_code, 200)
+          self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+          self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+          self.assertEqual(response["Accept-Ranges"], "bytes")
+
+          not_modified = self.get(HTTP_IF_NONE_MATCH=response["ETag"])
+          self.assertEqual(not_modified.status_code, 304)
+          self.assertEqual(not_modified["ETag"], response["ETag"])
+
+     def test_byte_ranges(self):
+          response = self.get(HTTP_RANGE="bytes=2-5")
+          self.assertEqual(response.status_code, 206)
+          self.assertEqual(b"".join(response.streaming_content), b"2345")
+          self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+          self.assertEqual(response["Content-Length"], "4")
+
+          suffix = self.get(HTTP_RANGE="bytes=-3")
+          self.assertEqual(b"".join(suffix.streaming_content), b"789")
+
+          stale = self.get(HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"stale"')
+          self.assertEqual(stale.status_code, 200)
+
+          unsatisfiable = self.get(HTTP_RANGE="bytes=10-")
+          self.assertEqual(unsatisfiable.status_code, 416)
+          self.assertEqual(unsatisfiable["Content-Range"], "bytes */10")
+
+     def test_paths_outside_media_root_are_not_served(self):
+          self.assertEqual(self.client.get("/media/article_images/%2e%2e/%2e%2e/manage.py").status_code, 400)
+          self.assertEqual(self.client.get("/media/article_images/").status_code, 404)
+
+class SeedingTests(APITestCase):
+     def test_iter_json_array_streams_items_across_chunk_boundaries(self):
+          items = [{"pk": i, "text": "x" * i, "values": [1.5, None, True]} for i in range(20)]
+          streamed = list(iter_json_array(io.StringIO(json.dumps(items, indent=5)), chunk_size=7))
+          self.assertEqual(streamed, items)
+          self.assertEqual(list(iter_json_array(io.StringIO("[]"))), [])
+
+     def test_load_fixture_bulk_inserts_without_signals(self):
+          with open("seed_data.json", encoding="utf-8") as file:
+               fixture = json.load(file)
+
+          counts = load_fixture("seed_data.json", make_password("seed-pass"), batch_size=2)
+          self.assertEqual(sum(counts.values()), len(fixture))
+
+          admin = User.objects.get(username="admin")
+          self.assertTrue(admin.check_password("seed-pass"))
+          self.assertEqual(list(admin.groups.values_list("name", flat=True)), ["Admins"])
+          article = Article.objects.order_by("pk").first()
+          expected = next(entry for entry in fixture if entry["model"] == "api.article")
+          self.assertEqual(article.created_at.isoformat().replace("+00:00", "Z")[:19], expected["fields"]["created_at"][:19])
+          self.assertTrue(article.slug)
+          # Sequences continue after the fixture's explicit primary keys.
+          self.assertGreater(User.objects.create_user(username="afterseed", password="x").pk, admin.pk)
+
+     def test_seed_db_can_run_twice(self):
+          with mock.patch.dict(os.environ, SEED_PASSWORD="seed-pass"):
+               call_command("seed_db", stdout=io.StringIO())
+               User.objects.filter(username="admin").update(email="changed@example.com")
+               call_command("seed_db", stdout=io.StringIO())
+
+          with open("seed_data.json", encoding="utf-8") as file:
+               fixture = json.load(file)
+          users = [entry for entry in fixture if entry["model"] == "auth.user"]
+          self.assertEqual(User.objects.count(), len(users))
+          admin = next(entry for entry in users if entry["fields"]["username"] == "admin")
+          self.assertEqual(User.objects.get(username="admin").email, admin["fields"]["email"])
+          self.assertEqual(Article.objects.count(), sum(entry["model"] == "api.article" for entry in fixture))
+          # Seeded users can log in with a token like users created through the API.
+          self.assertFalse(User.objects.filter(auth_token__isnull=True).exists())
+
+     def test_generate_fake_data(self):
+          created = generate_fake_data(users=5, articles=10, comments=30, likes=20, password_hash=make_password("x"), seed=1)
+          self.assertEqual(created, {"users": 5, "articles": 10, "comments": 30, "likes": 20})
+          self.assertEqual(UserProfile.objects.count(), 5)
+          self.assertEqual(Comment.objects.exclude(reply_to=None).count(), 10)
+          self.assertEqual(Article.objects.filter(tags__isnull=False).distinct().count(), 10)
+
+class BenchmarkSuiteTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.output = tempfile.mkdtemp()
+          self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+          # Like the test client, keep request signals from closing the test transaction's connection.
+          for signal in (request_started, request_finished):
+               signal.disconnect(close_old_connections)
+               self.addCleanup(signal.connect, close_old_connections)
+
+     def test_bench_api_reports_every_scenario_and_compares_baselines(self):
+          path = f"{self.output}/results.json"
+          call_command(
+               "bench_api", iterations=2, warmup=1, users=3, articles=5, comments=6, likes=4,
+               use_current_db=True, output=path, stdout=io.StringIO(),
+          )
+          with open(path) as file:
+               results = json.load(file)
+
+          self.assertIn("token_login", results["scenarios"])
+          for name, stats in results["scenarios"].items():
+               self.assertEqual(stats["errors"], 0, name)
+               self.assertGreater(stats["queries_per_request"], 0, name)
+               self.assertLessEqual(stats["p50_ms"], stats["p99_ms"], name)
+
+          self.assertEqual(compare_results(results, results), [])
+          faster = json.loads(json.dumps(results))
+          faster["scenarios"]["article_detail"]["p95_ms"] = results["scenarios"]["article_detail"]["p95_ms"] / 2
+          faster["scenarios"]["articles_list"]["queries_per_request"] -= 1
+          regressions = compare_results(results, faster)
+          self.assertEqual(len(regressions), 2)
+          self.assertTrue(regressions[0].startswith("articles_list: queries/request"))
+
+@override_settings(REQUEST_INSTRUMENTATION=True)
+class RequestInstrumentationTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.users = [User.objects.create_user(username=f"liker{i}", password="x") for i in range(4)]
+          self.article = Article.objects.create(author=self.users[0].userprofile, title="Profiled article", content="Some article content.")
+          for user in self.users:
+               ArticleLike.objects.create(user=user.userprofile, article=self.article)
+
+     def test_server_timing_and_log_record_are_labelled_with_the_action(self):
+          with self.assertLogs("core.instrumentation", "INFO") as logs:
+               response = self.client.get("/api/articles/", HTTP_ACCEPT="application/json")
+          self.assertRegex(response["Server-Timing"], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+')
+          self.assertIn('view;desc="ArticleViewSet.list"', response["Server-Timing"])
+
+          record = json.loads(logs.records[-1].getMessage())
+          self.assertEqual(logs.records[-1].levelname, "INFO")
+          self.assertEqual((record["view"], record["status"]), ("ArticleViewSet.list", 200))
+          self.assertGreater(record["queries"], 0)
+          self.assertGreater(record["serializer_ms"], 0)
+          self.assertEqual(record["duplicate_queries"], [])
+
+     def test_repeated_queries_are_reported_as_likely_n_plus_one(self):
+          with self.assertLogs("core.instrumentation", "WARNING") as logs:
+               response = self.client.get(f"/api/articles/{self.article.id}/likes/", HTTP_ACCEPT="application/json")
+          record = json.loads(logs.records[-1].getMessage())
+          self.assertEqual(record["view"], "ArticleViewSet.likes")
+          self.assertTrue(any(duplicate["count"] >= len(self.users) for duplicate in record["duplicate_queries"]))
+          self.assertNotIn('dup;desc="0 repeated queries"', response["Server-Timing"])
+
+class QueryPlanIndexTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          users = [User.objects.create_user(username=f"planner{i}", password="x") for i in range(3)]
+          self.author = users[0].userprofile
+          for i in range(30):
+               article = Article.objects.create(
+                    author=users[i % 3].userprofile,
+                    title=f"Planned article {i}",
+                    content="Some article content.",
+                    category="Technology" if i % 2 else "Travel",
+                    status="published" if i % 3 else "draft",
+               )
+               root = Comment.objects.create(author=self.author, article=article, content="root")
+               Comment.objects.create(author=self.author, article=article, content="reply", reply_to=root)
+               ArticleLike.objects.create(user=users[i % 3].userprofile, article=article)
+          self.article = article
+
+     def query_plans(self, path, table):
+          """EXPLAIN output for each SELECT on `table` that the endpoint runs."""
+          with CaptureQueriesContext(connection) as ctx:
+               response = self.client.get(path, HTTP_ACCEPT="application/json")
+          self.assertEqual(response.status_code, 200)
+          statements = [query["sql"] for query in ctx.captured_queries if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]]
+          self.assertTrue(statements)
+          explain = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+          plans = []
+          with connection.cursor() as cursor:
+               if connection.vendor == "postgresql":
+                    # Test tables are tiny; make the planner show which index it would use.
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+               for sql in statements:
+                    cursor.execute(explain + sql)
+                    plans.append("\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall()))
+          return "\n".join(plans)
+
+     def test_article_list_filters_use_composite_indexes(self):
+          self.assertIn("article_status_recent_idx", self.query_plans("/api/articles/?status=published", "api_article"))
+          self.assertIn("article_author_recent_idx", self.query_plans(f"/api/articles/?author={self.author.id}", "api_article"))
+          self.assertIn("article_created_idx", self.query_plans("/api/articles/?ordering=-created_at", "api_article"))
+          if connection.vendor == "postgresql":
+               # SQLite compares iexact with LIKE, which cannot use the UPPER() index.
+               self.assertIn("article_category_upper_idx", self.query_plans("/api/articles/?category=technology", "api_article"))
+
+     def test_comment_and_like_lists_use_article_indexes(self):
+          self.assertIn("comment_root_idx", self.query_plans(f"/api/articles/{self.article.id}/comments/", "api_comment"))
+          self.assertIn("like_article_created_idx", self.query_plans(f"/api/articles/{self.article.id}/likes/", "api_articlelike"))
+
+class SparseFieldsetTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.users = [User.objects.create_user(username=f"card{i}", password="x") for i in range(2)]
+          for i in range(3):
+               article = Article.objects.create(
+                    author=self.users[0].userprofile,
+                    title=f"Card article {i}",
+                    content="Long article content. " * 40,
+               )
+               article.tags.add("cards")
+               for user in self.users:
+                    ArticleLike.objects.create(user=user.userprofile, article=article)
+
+     def get(self, path):
+          with CaptureQueriesContext(connection) as ctx:
+               response = self.client.get(path, HTTP_ACCEPT="application/json")
+          self.assertEqual(response.status_code, 200)
+          return response.json(), [query["sql"] for query in ctx.captured_queries]
+
+     def test_list_defaults_to_summary_without_loading_content(self):
+          data, queries = self.get("/api/articles/")
+          card = data["results"][0]
+          self.assertEqual(set(card), {
+               "id", "author_id", "author_username", "title", "category", "excerpt",
+               "image", "image_variants", "created_at", "like_count", "liked_by_me", "status",
+          })
+          self.assertEqual(card["excerpt"], ("Long article content. " * 40)[:200])
+          article_select = next(sql for sql in queries if 'FROM "api_article"' in sql and "LIMIT" in sql)
+          columns = article_select.split(" FROM ")[0]
+          self.assertNotIn('"api_article"."content", ', columns)
+          self.assertNotIn('"auth_user"."password"', columns)
+          self.assertFalse(any('"api_articlelike"' in sql or '"taggit_tag"' in sql for sql in queries))
+
+          full, _ = self.get("/api/articles/?view=full")
+          self.assertIn("content", full["results"][0])
+          self.assertEqual(len(full["results"][0]["likes"]), 2)
+
+     def test_fields_and_omit_select_the_rendered_fields(self):
+          data, _ = self.get("/api/articles/?fields=id,title,tags")
+          self.assertEqual(data["results"][0], {"id": data["results"][0]["id"], "title": "Card article 2", "tags": ["cards"]})
+
+          data, _ = self.get("/api/articles/?omit=excerpt,image,image_variants")
+          self.assertNotIn("excerpt", data["results"][0])
+          self.assertIn("like_count", data["results"][0])
+
+          article_id = data["results"][0]["id"]
+          detail, _ = self.get(f"/api/articles/{article_id}/?omit=content")
+          self.assertNotIn("content", detail)
+          self.assertIn("likes", detail)
+
+     def test_unknown_fields_are_rejected(self):
+          response = self.client.get("/api/articles/?fields=title,password")
+          self.assertEqual(response.status_code, 400)
+          # Write-only serializer fields are not part of the representation either.
+          for query in ["fields=author", "fields=id,author", "omit=author"]:
+               self.assertEqual(self.client.get(f"/api/articles/?{query}").status_code, 400)
+               self.assertEqual(self.client.get(f"/api/articles/{Article.objects.first().id}/?{query}").status_code, 400)
+
+class LikeStateTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.users = [User.objects.create_user(username=f"fan{i}", password="x") for i in range(3)]
+          author = self.users[0].userprofile
+          self.articles = [Article.objects.create(author=author, title=f"Liked article {i}", content="Content.") for i in range(3)]
+          for user in self.users:
+               ArticleLike.objects.create(user=user.userprofile, article=self.articles[0])
+          ArticleLike.objects.create(user=self.users[1].userprofile, article=self.articles[1])
+          Article.objects.filter(pk=self.articles[0].pk).update(like_count=3)
+          Article.objects.filter(pk=self.articles[1].pk).update(like_count=1)
+
+     def test_like_state_returns_counts_and_own_state_in_one_query(self):
+          self.client.force_authenticate(self.users[1])
+          ids = ",".join(str(article.id) for article in reversed(self.articles))
+          with CaptureQueriesContext(connection) as ctx:
+               response = self.client.get(f"/api/articles/like-state/?ids={ids},999999")
+          self.assertEqual(response.status_code, 200)
+          self.assertEqual(response.data["results"], [
+               {"id": self.articles[2].id, "like_count": 0, "liked_by_me": False},
+               {"id": self.articles[1].id, "like_count": 1, "liked_by_me": True},
+               {"id": self.articles[0].id, "like_count": 3, "liked_by_me": True},
+          ])
+          self.assertEqual(sum('"api_article"' in query["sql"] for query in ctx.captured_queries), 1)
+          # The EXISTS filters on the profile id directly instead of joining the profile per row.
+          state_query = next(query["sql"] for query in ctx.captured_queries if "EXISTS" in query["sql"])
+          self.assertNotIn('"api_userprofile"', state_query)
+
+     def test_like_state_for_anonymous_users_is_false(self):
+          response = self.client.get(f"/api/articles/like-state/?ids={self.articles[0].id}")
+          self.assertEqual(response.data["results"], [{"id": self.articles[0].id, "like_count": 3, "liked_by_me": False}])
+
+     def test_like_state_validates_ids(self):
+          self.assertEqual(self.client.get("/api/articles/like-state/").status_code, 400)
+          self.assertEqual(self.client.get("/api/articles/like-state/?ids=1,abc").status_code, 400)
+          ids = ",".join(str(i) for i in range(1, 102))
+          self.assertEqual(self.client.get(f"/api/articles/like-state/?ids={ids}").status_code, 400)
+
+     def test_list_can_return_liked_by_me_instead_of_likes(self):
+          self.client.force_authenticate(self.users[2])
+          with CaptureQueriesContext(connection) as ctx:
+               response = self.client.get("/api/articles/?fields=id,liked_by_me", HTTP_ACCEPT="application/json")
+          states = {row["id"]: row["liked_by_me"] for row in response.json()["results"]}
+          self.assertEqual(states, {self.articles[0].id: True, self.articles[1].id: False, self.articles[2].id: False})
+          # Computed by an EXISTS in the article query, not by loading likes.
+          self.assertFalse(any('FROM "api_articlelike"' in query["sql"].split("EXISTS")[0] for query in ctx.captured_queries))
+
+          detail = self.client.get(f"/api/articles/{self.articles[0].id}/").data
+          self.assertTrue(detail["liked_by_me"])
+          self.assertEqual(len(detail["likes"]), 3)
+
+class IdempotentLikeToggleTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.user = User.objects.create_user(username="toggler", password="x")
+          self.article = Article.objects.create(author=self.user.userprofile, title="Toggled article", content="Content.")
+          self.client.force_authenticate(self.user)
+          self.url = f"/api/articles/{self.article.id}/like/"
+
+     def test_put_and_delete_are_idempotent(self):
+          for method, liked, count in [("put", True, 1), ("put", True, 1), ("delete", False, 0), ("delete", False, 0)]:
+               response = getattr(self.client, method)(self.url)
+               self.assertEqual(response.status_code, 200)
+               self.assertEqual(response.data, {"id": self.article.id, "like_count": count, "liked_by_me": liked})
+               self.assertEqual(ArticleLike.objects.filter(article=self.article).count(), count)
+          self.article.refresh_from_db()
+          self.assertEqual(self.article.like_count, 0)
+
+     def test_toggle_requires_a_role_and_an_existing_article(self):
+          self.assertEqual(self.client.put("/api/articles/999999/like/").status_code, 404)
+          self.assertFalse(ArticleLike.objects.filter(article_id=999999).exists())
+          self.client.force_authenticate(None)
+          self.assertIn(self.client.put(self.url).status_code, (401, 403))
+
+     def test_toggle_reports_the_stored_state_for_users_without_a_profile(self):
+          # Users loaded from raw fixtures skip the post_save hook that creates profiles.
+          User.objects.bulk_create([User(username="fixture-user")])
+          user = User.objects.get(username="fixture-user")
+          user.groups.add(Group.objects.get(name="Users"))
+          self.client.force_authenticate(user)
+          for method in ("put", "put", "delete"):
+               response = getattr(self.client, method)(self.url)
+               self.assertEqual(response.status_code, 200)
+               self.assertEqual(response.data, {"id": self.article.id, "like_count": 0, "liked_by_me": False})
+
+     def test_toggle_invalidates_cached_article_responses(self):
+          self.client.force_authenticate(None)
+          self.assertEqual(self.client.get(f"/api/articles/{self.article.id}/").data["like_count"], 0)
+          self.client.force_authenticate(self.user)
+          self.client.put(self.url)
+          self.client.force_authenticate(None)
+          self.assertEqual(self.client.get(f"/api/articles/{self.article.id}/").data["like_count"], 1)
+
+     def test_toggle_leaves_rows_written_by_other_requests_alone(self):
+          # Another request already stored (and counted) this like.
+          ArticleLike.objects.bulk_create([ArticleLike(user=self.user.userprofile, article=self.article)])
+          Article.objects.filter(pk=self.article.pk).update(like_count=1)
+          for _ in range(2):
+               self.assertEqual(set_article_like(self.article.id, self.user, True), (1, False, True))
+
+          # ... and another one already removed it.
+          ArticleLike.objects.filter(article=self.article)._raw_delete(ArticleLike.objects.db)
+          Article.objects.filter(pk=self.article.pk).update(like_count=0)
+          for _ in range(2):
+               self.assertEqual(set_article_like(self.article.id, self.user, False), (0, False, False))
+
+class ConcurrentLikeToggleTests(APITransactionTestCase):
+     # Threads need committed rows and a database that makes writers wait:
+     # in-memory SQLite fails concurrent writers with "table is locked", so
+     # the settings give SQLite a file-backed test database.
+     def setUp(self):
+          if connection.vendor == "sqlite" and connection.is_in_memory_db():
+               self.skipTest("needs a file-backed or server database")
+          cache.clear()
+          self.users = [User.objects.create_user(username=f"racer{i}", password="x") for i in range(4)]
+          self.article = Article.objects.create(author=self.users[0].userprofile, title="Raced article", content="Content.")
+
+     def toggle(self, user, method, barrier):
+          client = APIClient()
+          client.force_authenticate(user)
+          try:
+               barrier.wait()
+               return getattr(client, method)(f"/api/articles/{self.article.id}/like/").status_code
+          finally:
+               connection.close()
+
+     def race(self, calls):
+          barrier = threading.Barrier(len(calls))
+          with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+               futures = [executor.submit(self.toggle, user, method, barrier) for user, method in calls]
+               return [future.result() for future in futures]
+
+     def test_parallel_toggles_never_double_count(self):
+          # Every user likes the article twice at the same time.
+          statuses = self.race([(user, "put") for user in self.users * 2])
+          self.assertEqual(statuses, [200] * 8)
+          self.article.refresh_from_db()
+          self.assertEqual(self.article.like_count, 4)
+          self.assertEqual(ArticleLike.objects.filter(article=self.article).count(), 4)
+
+          statuses = self.race([(user, "delete") for user in self.users[:2] * 2] + [(self.users[2], "put")] * 2)
+          self.assertEqual(statuses, [200] * 6)
+          self.article.refresh_from_db()
+          self.assertEqual(self.article.like_count, 2)
+          self.assertEqual(
+               set(ArticleLike.objects.filter(article=self.article).values_list("user__user__username", flat=True)),
+               {"racer2", "racer3"},
+          )
+
+class FastJSONRenderingTests(APITestCase):
+     def test_renders_the_same_document_as_drf_json_renderer(self):
+          data = {
+               "when": timezone.make_aware(datetime.datetime(2025, 3, 16, 8, 54, 48, 123456), datetime.timezone.utc),
+               "day": datetime.date(2025, 3, 16),
+               "price": decimal.Decimal("9.50"),
+               "label": gettext_lazy("Published"),
+               "id": uuid.UUID(int=1),
+               "text": "line\u2028break ünïcode",
+               "nested": [{"count": 1}],
+          }
+          for accepted in ("application/json", "application/json; indent=4"):
+               expected = JSONRenderer().render(data, accepted)
+               rendered = FastJSONRenderer().render(data, accepted)
+               self.assertEqual(json.loads(rendered), json.loads(expected))
+          self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+     def test_parser_reads_and_rejects_json(self):
+          self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"title": "x"}')), {"title": "x"})
+          with self.assertRaises(ParseError):
+               FastJSONParser().parse(io.BytesIO(b'{"title": '))
+
+class RendererSettingsTests(APITestCase):
+     def test_unknown_renderer_names_are_rejected(self):
+          with mock.patch.dict(os.environ, API_RENDERERS="json,xml"):
+               with self.assertRaisesMessage(ImproperlyConfigured, "Unknown API_RENDERERS: xml. Valid names: json, stdjson, browsable."):
+                    runpy.run_module("HERo_backend.settings")
+
+class ResponseCompressionTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          author = User.objects.create_user(username="compressor", password="x").userprofile
+          for i in range(10):
+               Article.objects.create(author=author, title=f"Compressed article {i}", content="Compressible content. " * 50)
+
+     def test_large_json_responses_are_compressed(self):
+          plain = self.client.get("/api/articles/?view=full").content
+          self.assertGreater(len(plain), 1024)
+
+          if brotli is not None:
+               response = self.client.get("/api/articles/?view=full", HTTP_ACCEPT_ENCODING="gzip, br")
+               self.assertEqual(response["Content-Encoding"], "br")
+               self.assertEqual(brotli.decompress(response.content), plain)
+
+          response = self.client.get("/api/articles/?view=full", HTTP_ACCEPT_ENCODING="gzip, br;q=0")
+          self.assertEqual(response["Content-Encoding"], "gzip")
+          self.assertEqual(gzip.decompress(response.content), plain)
+          self.assertIn("Accept-Encoding", response["Vary"])
+          self.assertTrue(response["ETag"].startswith('W/"'))
+
+     @skipUnless(brotli, "Brotli is not installed")
+     def test_brotli_bodies_are_padded_to_a_random_length(self):
+          body = b'{"csrf": "secret"}' * 100
+          compressed = [compress_brotli(body, 100) for _ in range(20)]
+          self.assertTrue(all(brotli.decompress(data) == body for data in compressed))
+          self.assertGreater(len({len(data) for data in compressed}), 1)
+          self.assertEqual(brotli.decompress(b"".join(compress_sequence_brotli([body[:50], body[50:]], 100))), body)
+
+     def test_small_responses_are_not_compressed(self):
+          article = Article.objects.first()
+          response = self.client.get(f"/api/articles/{article.id}/?fields=id,title", HTTP_ACCEPT_ENCODING="gzip, br")
+          self.assertFalse(response.has_header("Content-Encoding"))
+
+class DataExportTests(APITestCase):
+     def setUp(self):
+          cache.clear()
+          self.admin = User.objects.create_user(username="exporter", password="x")
+          self.admin.groups.add(Group.objects.get(name="Admins"))
+          author = User.objects.create_user(username="writer", password="x").userprofile
+          self.articles = []
+          for i in range(5):
+               article = Article.objects.create(author=author, title=f"Exported article {i}", content="Body, with \"quotes\"\nand lines.")
+               article.tags.add("export", f"tag{i}")
+               self.articles.append(article)
+          parent = Comment.objects.create(author=author, article=self.articles[0], content="First")
+          Comment.objects.create(author=author, article=self.articles[0], content="Reply", reply_to=parent)
+          ArticleLike.objects.create(user=self.admin.userprofile, article=self.articles[1])
+
+     def test_export_is_admin_only(self):
+          self.assertIn(self.client.get("/api/export/articles.ndjson").status_code, (401, 403))
+          self.client.force_authenticate(User.objects.get(username="writer"))
+          self.assertEqual(self.client.get("/api/export/articles.ndjson").status_code, 403)
+
+     def test_articles_stream_as_ndjson(self):
+          self.client.force_authenticate(self.admin)
+          response = self.client.get("/api/export/articles.ndjson")
+          self.assertEqual(response.status_code, 200)
+          self.assertTrue(response.streaming)
+          self.assertEqual(response["Content-Type"], "application/x-ndjson")
+          self.assertIn("attachment", response["Content-Disposition"])
+
+          rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+          self.assertEqual([row["id"] for row in rows], [article.id for article in self.articles])
+          self.assertEqual(rows[0]["tags"], ["export", "tag0"])
+          self.assertEqual(rows[0]["author_username"], "writer")
+          self.assertEqual(rows[0]["content"], self.articles[0].content)
+
+     def test_comments_and_likes_stream_as_csv(self):
+          self.client.force_authenticate(self.admin)
+          response = self.client.get("/api/export/comments.csv")
+          self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+          rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+          self.assertEqual([row["content"] for row in rows], ["First", "Reply"])
+          self.assertEqual(rows[1]["reply_to_id"], rows[0]["id"])
+
+          response = self.client.get("/api/export/likes.csv")
+          rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+          self.assertEqual([(row["username"], row["article_id"]) for row in rows], [("exporter", str(self.articles[1].id))])
+
+     def test_unknown_resource_or_format_is_404(self):
+          self.client.force_authenticate(self.admin)
+          self.assertEqual(self.client.get("/api/export/users.ndjson").status_code, 404)
+          self.assertEqual(self.client.get("/api/export/articles.xml").status_code, 404)
+
+     def test_tags_are_loaded_once_per_chunk(self):
+          ContentType.objects.get_for_model(Article)
+          # One articles query, then one tag query per chunk of two.
+          with self.assertNumQueries(4):
+               rows = b"".join(export_stream("articles", "ndjson", chunk_size=2)).splitlines()
+          self.assertEqual(len(rows), 5)
+
+     def test_export_command_writes_file(self):
+          with tempfile.TemporaryDirectory() as directory:
+               output = Path(directory) / "articles.csv"
+               call_command("export_data", "articles", "--format", "csv", "--output", str(output), stdout=io.StringIO())
+               with open(output, newline="") as file:
+                    rows = list(csv.DictReader(file))
+          self.assertEqual(len(rows), 5)
+          self.assertEqual(rows[0]["tags"], "export,tag0")
+          self.assertEqual(rows[0]["content"], self.articles[0].content)
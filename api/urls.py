@@ -1,5 +1,6 @@
 from django.urls import path, include
 from .views import *
+from . import async_views
 from rest_framework.authtoken import views as auth_views
 from rest_framework.routers import DefaultRouter
 
@@ -16,4 +17,9 @@ urlpatterns = [
      path('', include(router.urls)),
      path('api-auth/', include('rest_framework.urls')),
      path('login/', auth_views.obtain_auth_token),
+     path('async/articles/', async_views.article_list, name='async-article-list'),
+     path('async/articles/<int:pk>/', async_views.article_detail, name='async-article-detail'),
+     path('async/articles/<int:pk>/comments/', async_views.article_comments, name='async-article-comments'),
+     path('async/articles/<int:pk>/likes/', async_views.article_likes, name='async-article-likes'),
+     path('export/<slug:resource>.<slug:file_format>', ExportView.as_view(), name='export'),
      ]
\ No newline at end of file
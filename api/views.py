@@ -1,23 +1,35 @@
 from rest_framework.viewsets import ModelViewSet, ViewSet
+from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from rest_framework.reverse import reverse
 from rest_framework.authtoken.models import Token
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from core.permissions import *
 from core.authentication import get_tokens_for_user
+from core.utils import try_parse_int
 from .models import *
 from .serializers import *
 from .filters import ArticleFilter, CommentFilter
+from .caching import AnonymousResponseCacheMixin
+from .exports import EXPORTS, EXPORT_FORMATS, export_stream
+from .fieldsets import SparseFieldsetMixin
+from .likes import set_article_like
+from .pagination import CommentThreadCursorPagination, OptionalCursorPaginationMixin
+from .search import ArticleSearchFilter
 
 
 class AuthViewSet(ViewSet):
@@ -38,9 +50,9 @@ class AuthViewSet(ViewSet):
           serializer.is_valid(raise_exception=True)
           user = serializer.save()
 
-          token, _ = Token.objects.get_or_create(user=user)
+          # The post_save hook created the token and cached it on the instance.
           jwt = get_tokens_for_user(user)
-          return Response({'token': token.key, 'jwt': jwt})
+          return Response({'token': user.auth_token.key, 'jwt': jwt})
 
      @action(detail=False, methods=['post'])
      def login(self, request):
@@ -73,14 +85,49 @@ class UserProfileViewSet(ModelViewSet):
      permission_classes = [UserProfilePermissionClass]
 
 @method_decorator(csrf_exempt, name='dispatch')
-class ArticleViewSet(ModelViewSet):
-     queryset = Article.objects.annotate(
-          likes=Count("articlelike", filter=Q(articlelike__reaction="like"))
-     ).order_by("-id")
+class ArticleViewSet(AnonymousResponseCacheMixin, OptionalCursorPaginationMixin, SparseFieldsetMixin, ModelViewSet):
+     queryset = Article.objects.select_related("author__user").prefetch_related(
+          "tags",
+          Prefetch("articlelike_set", queryset=ArticleLike.objects.only("id", "article_id", "user_id")),
+     ).defer("search_vector").order_by("-id")
      serializer_class = ArticleSerializer
-     filter_backends = [OrderingFilter, DjangoFilterBackend, SearchFilter]
+     filter_backends = [OrderingFilter, DjangoFilterBackend, ArticleSearchFilter]
      filterset_class = ArticleFilter
-     search_fields = ["title"]
+     search_fields = ["title", "description", "content", "tags__name"]
+     summary_fields = [
+          "id", "author_id", "author_username", "title", "category", "excerpt",
+          "image", "image_variants", "created_at", "like_count", "liked_by_me", "status",
+     ]
+     like_state_max_ids = 100
+
+     def narrow_queryset(self, queryset, fields):
+          if fields is None or "liked_by_me" in fields:
+               queryset = queryset.annotate(liked_by_me=article_liked_by(self.request.user))
+          if fields is None:
+               return queryset
+          # Skip loading what the chosen fields do not render.
+          queryset = queryset.prefetch_related(None)
+          if "tags" in fields:
+               queryset = queryset.prefetch_related("tags")
+          if "likes" in fields:
+               queryset = queryset.prefetch_related(
+                    Prefetch("articlelike_set", queryset=ArticleLike.objects.only("id", "article_id", "user_id")),
+               )
+          if "author_username" not in fields:
+               queryset = queryset.select_related(None)
+          else:
+               queryset = queryset.defer("author__bio", "author__profile_pic_variants", "author__user__password")
+          if "excerpt" in fields:
+               queryset = queryset.annotate(content_excerpt=article_excerpt())
+          deferred = {"content", "description", "image_variants"} - set(fields)
+          if "image" in fields:
+               deferred.discard("image_variants")
+          return queryset.defer(*deferred)
+
+     def get_cursor_pagination_class(self):
+          if self.action == "comments":
+               return CommentThreadCursorPagination
+          return super().get_cursor_pagination_class()
 
      def get_permissions(self):
           if self.action == "list" or self.action == "retrieve":
@@ -91,6 +138,8 @@ class ArticleViewSet(ModelViewSet):
                permission_classes = [EditArticle]
           elif self.action == "destroy":
                permission_classes = [DeleteArticle]
+          elif self.action == "like":
+               permission_classes = [PostArticleLike]
           else:
                permission_classes = [GetArticles]
           return [permission() for permission in permission_classes]
@@ -98,8 +147,14 @@ class ArticleViewSet(ModelViewSet):
      @action(detail=True, methods=['get'])
      def comments(self, request, pk=None):
           article = get_object_or_404(Article, pk=pk)
-          comments = Comment.objects.filter(article=article).order_by('created_at')
-          serializer = CommentSerializer(comments, many=True)
+          roots = Comment.objects.filter(article=article, reply_to=None).select_related('author__user').order_by('created_at', 'id')
+          max_depth = try_parse_int(request.query_params.get('depth'))
+          context = self.get_serializer_context()
+          page = self.paginate_queryset(roots)
+          if page is not None:
+               serializer = ThreadedCommentSerializer(attach_replies(page, max_depth), many=True, context=context)
+               return self.get_paginated_response(serializer.data)
+          serializer = ThreadedCommentSerializer(attach_replies(roots, max_depth), many=True, context=context)
           return Response(serializer.data)
 
      @action(detail=True, methods=['get'])
@@ -109,7 +164,35 @@ class ArticleViewSet(ModelViewSet):
           serializer = ArticleLikeSerializer(likes, many=True)
           return Response(serializer.data)
 
-class ArticleLikeViewSet(ModelViewSet):
+     @action(detail=True, methods=['put', 'delete'])
+     def like(self, request, pk=None):
+          """Idempotently likes (PUT) or unlikes (DELETE) the article for the caller."""
+          article_id = try_parse_int(pk)
+          result = set_article_like(article_id, request.user, request.method == 'PUT') if article_id is not None else None
+          if result is None:
+               raise NotFound()
+          like_count, _, liked = result
+          return Response({"id": article_id, "like_count": like_count, "liked_by_me": liked})
+
+     @action(detail=False, methods=['get'], url_path='like-state')
+     def like_state(self, request):
+          """Like count and the caller's own like state for ?ids=1,2,3, in one query."""
+          values = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+          ids = [try_parse_int(value) for value in values]
+          if not ids or None in ids:
+               raise ValidationError({"ids": "Provide a comma-separated list of article ids."})
+          if len(ids) > self.like_state_max_ids:
+               raise ValidationError({"ids": f"At most {self.like_state_max_ids} ids per request."})
+
+          states = (
+               Article.objects.filter(pk__in=ids)
+               .annotate(liked_by_me=article_liked_by(request.user))
+               .values('id', 'like_count', 'liked_by_me')
+          )
+          by_id = {state['id']: state for state in states}
+          return Response({"results": [by_id[pk] for pk in dict.fromkeys(ids) if pk in by_id]})
+
+class ArticleLikeViewSet(OptionalCursorPaginationMixin, ModelViewSet):
      queryset = ArticleLike.objects.all()
      serializer_class = ArticleLikeSerializer
      filter_backends = [OrderingFilter, DjangoFilterBackend]
@@ -124,9 +207,18 @@ class ArticleLikeViewSet(ModelViewSet):
           else:
                permission_classes = [GetArticleLikes] 
           return [permission() for permission in permission_classes]
-     
-class CommentViewSet(ModelViewSet):
-     queryset = Comment.objects.all()
+
+     def perform_create(self, serializer):
+          # Article.like_count follows through the ArticleLike post_save/post_delete receivers.
+          try:
+               with transaction.atomic():
+                    serializer.save()
+          except IntegrityError:
+               # A concurrent request created the same like after validation.
+               raise ValidationError("Each user is allowed to like an article only once.")
+
+class CommentViewSet(OptionalCursorPaginationMixin, ModelViewSet):
+     queryset = Comment.objects.select_related('author__user').order_by('id')
      serializer_class = CommentSerializer
      filter_backends = [OrderingFilter, DjangoFilterBackend]
      filterset_class = CommentFilter
@@ -144,22 +236,18 @@ class CommentViewSet(ModelViewSet):
                permission_classes = [GetComments]
           return [permission() for permission in permission_classes]
 
-     def list(self, request, *args, **kwargs):
-          res = super().list(request, *args, **kwargs)
-          if not isinstance(res.data, list):
-               return res
-          comments = list(res.data)
-          comments_dict = {comment["id"]: comment for comment in comments} 
-          root_comments = []
-          for comment in comments:
-               parent_id = comment.get('reply_to')
-               if parent_id is None:
-                    root_comments.append(comment)
-               else:
-                    parent = comments_dict.get(parent_id)
-                    if parent:
-                         if "replies" not in parent:
-                              parent["replies"] = []
-                         parent["replies"].append(comment)
-          res.data = root_comments
-          return res
\ No newline at end of file
+class ExportView(APIView):
+     """
+     Streams every article, comment or like as NDJSON or CSV, e.g.
+     /api/export/articles.ndjson. Admins only.
+     """
+     permission_classes = [ExportPermission]
+
+     def get(self, request, resource, file_format):
+          if resource not in EXPORTS or file_format not in EXPORT_FORMATS:
+               raise NotFound()
+          response = StreamingHttpResponse(export_stream(resource, file_format), content_type=EXPORT_FORMATS[file_format])
+          filename = f"{resource}-{timezone.now():%Y%m%d%H%M%S}.{file_format}"
+          response["Content-Disposition"] = f'attachment; filename="{filename}"'
+          response["Cache-Control"] = "no-store"
+          return response
@@ -1,5 +1,25 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.functional import cached_property
+from api.models import UserProfile
 from api.serializers import APITokenObtainPairSerializer
-from rest_framework.authentication import SessionAuthentication
+from rest_framework.authentication import (
+     BaseAuthentication,
+     BasicAuthentication,
+     SessionAuthentication,
+     TokenAuthentication,
+     get_authorization_header,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+ROLE_GROUPS = {
+     "user": ["Users"],
+     "moderator": ["Moderators"],
+     "admin": ["Admins"],
+}
 
 
 def get_tokens_for_user(user):
@@ -13,4 +33,87 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
      def enforce_csrf(self, request):
           if request.content_type == "application/json":
                return
-          return super().enforce_csrf(request)
\ No newline at end of file
+          return super().enforce_csrf(request)
+
+class RoleTokenUser(TokenUser):
+     """
+     Stateless request user built from the access token claims. Group names and
+     the superuser flag come from the token, so permission checks need no queries.
+     """
+
+     @cached_property
+     def is_superuser(self):
+          return self.token.get("is_superuser", self.token.get("role") == "superuser")
+
+     @cached_property
+     def _group_names(self):
+          if "groups" in self.token:
+               return frozenset(self.token["groups"])
+          return frozenset(ROLE_GROUPS.get(self.token.get("role"), []))
+
+     @cached_property
+     def userprofile(self):
+          return UserProfile.objects.get(user_id=self.id)
+
+class RoleJWTAuthentication(JWTAuthentication):
+     """
+     JWTAuthentication that, with JWT_STATELESS_AUTH enabled, trusts the token's
+     role claims instead of loading the User row. Role changes then take effect
+     when the client's current access token expires.
+     """
+
+     def get_user(self, validated_token):
+          if settings.JWT_STATELESS_AUTH:
+               return JWTStatelessUserAuthentication.get_user(self, validated_token)
+          return super().get_user(validated_token)
+
+class CachedBasicAuthentication(BasicAuthentication):
+     """
+     BasicAuthentication that remembers verified credentials for
+     BASIC_AUTH_CACHE_TIMEOUT seconds, so repeated calls skip the password hasher.
+     Entries are keyed by an HMAC of the credentials and bound to the user's
+     current password hash, so a password change invalidates them.
+     """
+     key_salt = "core.authentication.CachedBasicAuthentication"
+
+     def cache_key(self, userid, password):
+          return "basic-auth:" + salted_hmac(self.key_salt, f"{userid}\0{password}").hexdigest()
+
+     def password_fingerprint(self, user):
+          return salted_hmac(self.key_salt, user.password).hexdigest()
+
+     def authenticate_credentials(self, userid, password, request=None):
+          key = self.cache_key(userid, password)
+          cached = cache.get(key)
+          if cached:
+               user_id, fingerprint = cached
+               user = User.objects.filter(pk=user_id, is_active=True).first()
+               if user and constant_time_compare(fingerprint, self.password_fingerprint(user)):
+                    return (user, None)
+
+          user, auth = super().authenticate_credentials(userid, password, request)
+          cache.set(key, (user.pk, self.password_fingerprint(user)), settings.BASIC_AUTH_CACHE_TIMEOUT)
+          return (user, auth)
+
+class HeaderDispatchAuthentication(BaseAuthentication):
+     """
+     Picks the single authenticator matching the Authorization header scheme
+     instead of trying every backend in turn. Requests without the header, or
+     with a scheme none of them handles, use session authentication.
+     """
+     scheme_authenticators = {
+          b"basic": CachedBasicAuthentication,
+          b"token": TokenAuthentication,
+          b"bearer": RoleJWTAuthentication,
+     }
+     fallback_authenticator = CsrfExemptSessionAuthentication
+
+     def authenticate(self, request):
+          header = get_authorization_header(request).split()
+          authenticator_class = self.scheme_authenticators.get(header[0].lower()) if header else None
+          if authenticator_class is None:
+               return self.fallback_authenticator().authenticate(request)
+          return authenticator_class().authenticate(request)
+
+     def authenticate_header(self, request):
+          return self.fallback_authenticator().authenticate_header(request)
\ No newline at end of file
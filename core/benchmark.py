@@ -0,0 +1,186 @@
+import asyncio
+import math
+import statistics
+import time
+from io import BytesIO
+from urllib.parse import urlsplit
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+
+
+def percentile(samples, pct):
+     """Nearest-rank percentile of a non-empty list of numbers."""
+     ordered = sorted(samples)
+     rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+     return ordered[rank - 1]
+
+def summarize(samples):
+     """Latency summary, in milliseconds, of a list of durations in seconds."""
+     ms = [sample * 1000 for sample in samples]
+     return {
+          "requests": len(ms),
+          "mean_ms": round(statistics.fmean(ms), 3),
+          "p50_ms": round(percentile(ms, 50), 3),
+          "p95_ms": round(percentile(ms, 95), 3),
+          "p99_ms": round(percentile(ms, 99), 3),
+          "max_ms": round(max(ms), 3),
+     }
+
+def compare_results(current, baseline, tolerance=0.2):
+     """
+     Lists regressions of `current` against `baseline` (both as produced by
+     bench_api): p95 latency more than `tolerance` slower, more queries per
+     request, or new errors. Scenarios missing from either side are skipped.
+     """
+     regressions = []
+     for name, stats in current["scenarios"].items():
+          before = baseline.get("scenarios", {}).get(name)
+          if before is None:
+               continue
+          if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+               regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms")
+          if stats["queries_per_request"] > before["queries_per_request"]:
+               regressions.append(f"{name}: queries/request {before['queries_per_request']} -> {stats['queries_per_request']}")
+          if stats["errors"] > before["errors"]:
+               regressions.append(f"{name}: errors {before['errors']} -> {stats['errors']}")
+     return regressions
+
+class QueryCounter:
+     """Database execute wrapper that counts the queries run through it."""
+
+     def __init__(self):
+          self.count = 0
+
+     def __call__(self, execute, sql, params, many, context):
+          self.count += 1
+          return execute(sql, params, many, context)
+
+def run_scenario(step, iterations, warmup=5, using="default"):
+     """
+     Calls `step(i)` `iterations` times after `warmup` untimed calls. `step`
+     performs one request and returns its status code. Returns the latency
+     summary plus throughput, average queries per request and error count.
+     """
+     for i in range(warmup):
+          step(i)
+
+     samples, errors = [], 0
+     counter = QueryCounter()
+     with connections[using].execute_wrapper(counter):
+          start = time.perf_counter()
+          for i in range(warmup, warmup + iterations):
+               step_start = time.perf_counter()
+               status = step(i)
+               samples.append(time.perf_counter() - step_start)
+               errors += status >= 400
+          wall = time.perf_counter() - start
+
+     stats = summarize(samples)
+     stats.update(
+          throughput_rps=round(iterations / wall, 1),
+          queries_per_request=round(counter.count / iterations, 2),
+          errors=errors,
+     )
+     return stats
+
+class WSGIClient:
+     """
+     Sends requests through Django's real WSGI handler. Unlike the test Client,
+     this fires request_started/request_finished, so connection reuse and
+     CONN_MAX_AGE behave as they do under gunicorn.
+     """
+
+     def __init__(self):
+          self.handler = WSGIHandler()
+
+     def request(self, method, url, body=b"", content_type="application/json", headers=None):
+          parts = urlsplit(url)
+          environ = {
+               "REQUEST_METHOD": method,
+               "PATH_INFO": parts.path,
+               "QUERY_STRING": parts.query,
+               "SERVER_NAME": "localhost",
+               "SERVER_PORT": "80",
+               "SERVER_PROTOCOL": "HTTP/1.1",
+               "REMOTE_ADDR": "127.0.0.1",
+               "HTTP_HOST": "localhost",
+               "CONTENT_TYPE": content_type,
+               "CONTENT_LENGTH": str(len(body)),
+               "wsgi.input": BytesIO(body),
+               "wsgi.errors": BytesIO(),
+               "wsgi.url_scheme": "http",
+          }
+          for name, value in (headers or {}).items():
+               environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+          status = []
+          response = self.handler(environ, lambda code, response_headers, exc_info=None: status.append(code))
+          try:
+               content = b"".join(response)
+          finally:
+               response.close()
+          return int(status[0].split()[0]), content
+
+     def timed(self, method, url, **kwargs):
+          start = time.perf_counter()
+          status, content = self.request(method, url, **kwargs)
+          return time.perf_counter() - start, status, content
+
+class ASGIClient:
+     """
+     Drives an ASGI application in-process. `read_delay` makes the simulated
+     client slow to read each response chunk, like a client on a poor network.
+     """
+
+     def __init__(self, application, read_delay=0.0):
+          self.application = application
+          self.read_delay = read_delay
+
+     async def request(self, method, url, headers=None):
+          parts = urlsplit(url)
+          scope = {
+               "type": "http",
+               "asgi": {"version": "3.0"},
+               "http_version": "1.1",
+               "method": method,
+               "scheme": "http",
+               "path": parts.path,
+               "raw_path": parts.path.encode(),
+               "query_string": parts.query.encode(),
+               "headers": [(b"host", b"localhost")] + [
+                    (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+               ],
+               "server": ("localhost", 80),
+               "client": ("127.0.0.1", 0),
+          }
+          disconnected = asyncio.Event()
+          request_sent = False
+          status, chunks = None, []
+
+          async def receive():
+               nonlocal request_sent
+               if not request_sent:
+                    request_sent = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+               await disconnected.wait()
+               return {"type": "http.disconnect"}
+
+          async def send(message):
+               nonlocal status
+               if message["type"] == "http.response.start":
+                    status = message["status"]
+               elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+                    if self.read_delay:
+                         await asyncio.sleep(self.read_delay)
+
+          try:
+               await self.application(scope, receive, send)
+          finally:
+               disconnected.set()
+          return status, b"".join(chunks)
+
+     async def timed(self, method, url, **kwargs):
+          start = time.perf_counter()
+          status, content = await self.request(method, url, **kwargs)
+          return time.perf_counter() - start, status, content
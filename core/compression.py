@@ -0,0 +1,113 @@
+import secrets
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+     import brotli
+except ImportError:
+     brotli = None
+
+COMPRESSIBLE_CONTENT_TYPES = (
+     "text/",
+     "application/json",
+     "application/javascript",
+     "application/xml",
+     "application/x-ndjson",
+     "image/svg+xml",
+)
+BROTLI_QUALITY = 5
+
+
+def accepts_encoding(header, encoding):
+     """Whether an Accept-Encoding header allows `encoding` (a q=0 entry refuses it)."""
+     for entry in header.split(","):
+          name, *params = [part.strip() for part in entry.split(";")]
+          if name.lower() != encoding:
+               continue
+          for param in params:
+               key, _, value = param.partition("=")
+               if key.strip().lower() == "q":
+                    try:
+                         return float(value) > 0
+                    except ValueError:
+                         return False
+          return True
+     return False
+
+def brotli_padding(max_random_bytes):
+     """
+     A metadata meta-block of 1 to `max_random_bytes` (at most 256) random
+     bytes, which decoders skip. Like the random gzip filename
+     GZipMiddleware adds, it varies the compressed length against BREACH.
+     """
+     length = secrets.randbelow(min(max_random_bytes, 256)) + 1
+     # ISLAST=0, MNIBBLES=3 (metadata), reserved bit, MSKIPBYTES=1, MSKIPLEN-1, then zero bits to the byte boundary.
+     header = (3 << 1) | (1 << 4) | ((length - 1) << 6)
+     return header.to_bytes(2, "little") + secrets.token_bytes(length)
+
+def start_brotli_stream(max_random_bytes):
+     compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+     # Flushing before any input leaves the stream header byte-aligned, so the padding block can follow it.
+     return compressor, compressor.flush() + brotli_padding(max_random_bytes)
+
+def compress_brotli(data, max_random_bytes):
+     compressor, header = start_brotli_stream(max_random_bytes)
+     return header + compressor.process(data) + compressor.finish()
+
+def compress_sequence_brotli(sequence, max_random_bytes):
+     compressor, header = start_brotli_stream(max_random_bytes)
+     yield header
+     for chunk in sequence:
+          # Flush per chunk so streamed responses still reach the client progressively.
+          data = compressor.process(chunk) + compressor.flush()
+          if data:
+               yield data
+     yield compressor.finish()
+
+class CompressionMiddleware(GZipMiddleware):
+     """
+     GZipMiddleware with Brotli for clients that accept it, a minimum size
+     (COMPRESSION_MIN_SIZE) and a content-type allowlist, so images and other
+     already-compressed media or partial (206) responses pass through.
+     Brotli bodies get the same random-length padding as gzip ones.
+     Disabled with RESPONSE_COMPRESSION=False, e.g. behind a compressing proxy.
+     """
+
+     def __init__(self, get_response):
+          if not settings.RESPONSE_COMPRESSION:
+               raise MiddlewareNotUsed()
+          super().__init__(get_response)
+
+     def process_response(self, request, response):
+          if response.status_code == 206 or response.has_header("Content-Encoding"):
+               return response
+          if not response.get("Content-Type", "").startswith(COMPRESSIBLE_CONTENT_TYPES):
+               return response
+          if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+               return response
+
+          accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+          if brotli is None or (response.streaming and response.is_async) or not accepts_encoding(accept_encoding, "br"):
+               if not accepts_encoding(accept_encoding, "gzip"):
+                    patch_vary_headers(response, ("Accept-Encoding",))
+                    return response
+               return super().process_response(request, response)
+
+          patch_vary_headers(response, ("Accept-Encoding",))
+          if response.streaming:
+               response.streaming_content = compress_sequence_brotli(response.streaming_content, self.max_random_bytes)
+               del response.headers["Content-Length"]
+          else:
+               compressed = compress_brotli(response.content, self.max_random_bytes)
+               if len(compressed) >= len(response.content):
+                    return response
+               response.content = compressed
+               response.headers["Content-Length"] = str(len(compressed))
+
+          etag = response.get("ETag")
+          if etag and etag.startswith('"'):
+               response.headers["ETag"] = "W/" + etag
+          response.headers["Content-Encoding"] = "br"
+          return response
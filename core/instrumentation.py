@@ -0,0 +1,131 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+_current_profile = ContextVar("request_profile", default=None)
+_serializer_timing_installed = False
+
+
+class RequestProfile:
+     """Timings and SQL statistics gathered while one request is handled."""
+
+     def __init__(self):
+          self.start = time.perf_counter()
+          self.label = None
+          self.query_count = 0
+          self.query_time = 0.0
+          self.statements = Counter()
+          self.serializer_time = 0.0
+          self.serializer_depth = 0
+
+     def __call__(self, execute, sql, params, many, context):
+          # Database execute wrapper: params are kept out of `sql`, so the
+          # same statement run for every row of a page counts as a duplicate.
+          start = time.perf_counter()
+          try:
+               return execute(sql, params, many, context)
+          finally:
+               self.query_time += time.perf_counter() - start
+               self.query_count += 1
+               self.statements[sql] += 1
+
+     def duplicates(self):
+          threshold = settings.REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD
+          return {sql: count for sql, count in self.statements.items() if count >= threshold}
+
+def view_label(view_func, method):
+     """`ViewSet.action` for DRF viewsets, the view's qualified name otherwise."""
+     cls = getattr(view_func, "cls", None)
+     if cls is None:
+          return f"{view_func.__module__}.{view_func.__qualname__}"
+     actions = getattr(view_func, "actions", None) or {}
+     action = actions.get(method.lower(), method.lower())
+     return f"{cls.__name__}.{action}"
+
+def timed_data(prop):
+     def data(self):
+          profile = _current_profile.get()
+          if profile is None:
+               return prop.fget(self)
+          # Nested serializers evaluate .data inside their parent's; count the outermost only.
+          profile.serializer_depth += 1
+          start = time.perf_counter()
+          try:
+               return prop.fget(self)
+          finally:
+               profile.serializer_depth -= 1
+               if profile.serializer_depth == 0:
+                    profile.serializer_time += time.perf_counter() - start
+     return property(data)
+
+def install_serializer_timing():
+     global _serializer_timing_installed
+     if _serializer_timing_installed:
+          return
+     serializers.Serializer.data = timed_data(serializers.Serializer.data)
+     serializers.ListSerializer.data = timed_data(serializers.ListSerializer.data)
+     _serializer_timing_installed = True
+
+class RequestInstrumentationMiddleware:
+     """
+     Opt-in (REQUEST_INSTRUMENTATION) per-request profiling. Adds a
+     Server-Timing header with total, SQL and serializer time, and logs one
+     JSON record per request to the `core.instrumentation` logger, at WARNING
+     when the same SQL statement ran REQUEST_INSTRUMENTATION_DUPLICATE_THRESHOLD
+     or more times (a likely N+1).
+     """
+
+     def __init__(self, get_response):
+          if not settings.REQUEST_INSTRUMENTATION:
+               raise MiddlewareNotUsed()
+          self.get_response = get_response
+          install_serializer_timing()
+
+     def __call__(self, request):
+          profile = RequestProfile()
+          token = _current_profile.set(profile)
+          try:
+               with ExitStack() as stack:
+                    for connection in connections.all():
+                         stack.enter_context(connection.execute_wrapper(profile))
+                    response = self.get_response(request)
+          finally:
+               _current_profile.reset(token)
+
+          total = time.perf_counter() - profile.start
+          duplicates = profile.duplicates()
+          response["Server-Timing"] = ", ".join([
+               f'total;dur={total * 1000:.1f}',
+               f'db;dur={profile.query_time * 1000:.1f};desc="{profile.query_count} queries"',
+               f'serialize;dur={profile.serializer_time * 1000:.1f}',
+               f'dup;desc="{sum(duplicates.values())} repeated queries"',
+               f'view;desc="{profile.label or "unresolved"}"',
+          ])
+
+          record = {
+               "method": request.method,
+               "path": request.path,
+               "view": profile.label or "unresolved",
+               "status": response.status_code,
+               "duration_ms": round(total * 1000, 2),
+               "queries": profile.query_count,
+               "query_ms": round(profile.query_time * 1000, 2),
+               "serializer_ms": round(profile.serializer_time * 1000, 2),
+               "duplicate_queries": [{"sql": sql, "count": count} for sql, count in duplicates.items()],
+          }
+          logger.log(logging.WARNING if duplicates else logging.INFO, json.dumps(record))
+          return response
+
+     def process_view(self, request, view_func, view_args, view_kwargs):
+          profile = _current_profile.get()
+          if profile is not None:
+               profile.label = view_label(view_func, request.method)
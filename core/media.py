@@ -0,0 +1,131 @@
+import mimetypes
+import os
+import posixpath
+import re
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from core.storage import is_hashed_name
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class RangedFile:
+     """
+     File object limited to `length` bytes from `start`. Keeps fileno() so
+     gunicorn's file wrapper can still sendfile() just the requested range.
+     """
+
+     def __init__(self, file, start, length):
+          self.file = file
+          self.remaining = length
+          file.seek(start)
+
+     def read(self, size=-1):
+          if size < 0 or size > self.remaining:
+               size = self.remaining
+          data = self.file.read(size)
+          self.remaining -= len(data)
+          return data
+
+     def fileno(self):
+          return self.file.fileno()
+
+     def close(self):
+          self.file.close()
+
+def parse_range(header, size):
+     """
+     Returns (start, end) inclusive for a single `bytes=` range, None to serve
+     the whole file (absent, malformed or multi-range headers), or False when
+     the range cannot be satisfied.
+     """
+     match = RANGE_PATTERN.match(header.replace(" ", "")) if header else None
+     if not match or match.group(1) == match.group(2) == "":
+          return None
+     first, last = match.groups()
+     if first == "":
+          length = int(last)
+          if length == 0:
+               return False
+          return max(size - length, 0), size - 1
+     start = int(first)
+     end = min(int(last), size - 1) if last else size - 1
+     if start >= size or start > end:
+          return False
+     return start, end
+
+def range_applies(request, etag, last_modified):
+     if_range = request.META.get("HTTP_IF_RANGE")
+     if not if_range:
+          return True
+     if if_range.startswith('"'):
+          return if_range == etag
+     return parse_http_date_safe(if_range) == last_modified
+
+@require_safe
+def serve_media(request, path):
+     """
+     Serves MEDIA_ROOT files with strong ETags, conditional GET, single byte
+     ranges and far-future caching for content-hashed names. With
+     MEDIA_ACCEL_REDIRECT_PREFIX set, the body is left to the front proxy
+     (nginx X-Accel-Redirect) after the headers are computed here.
+     """
+     path = posixpath.normpath(path).lstrip("/")
+     try:
+          fullpath = safe_join(settings.MEDIA_ROOT, path)
+          stat = os.stat(fullpath)
+     except (OSError, ValueError):
+          raise Http404("File not found.")
+     if not os.path.isfile(fullpath):
+          raise Http404("File not found.")
+
+     last_modified = int(stat.st_mtime)
+     etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+     headers = {
+          "ETag": etag,
+          "Last-Modified": http_date(last_modified),
+          "Cache-Control": IMMUTABLE_CACHE_CONTROL if is_hashed_name(path) else f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}",
+          "Accept-Ranges": "bytes",
+     }
+
+     response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+     if response is not None:
+          for header, value in headers.items():
+               response[header] = value
+          return response
+
+     if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+          response = HttpResponse(content_type=mimetypes.guess_type(fullpath)[0] or "application/octet-stream")
+          response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + path
+          for header, value in headers.items():
+               response[header] = value
+          return response
+
+     byte_range = None
+     if range_applies(request, etag, last_modified):
+          byte_range = parse_range(request.META.get("HTTP_RANGE"), stat.st_size)
+     if byte_range is False:
+          response = HttpResponse(status=416)
+          response["Content-Range"] = f"bytes */{stat.st_size}"
+          return response
+
+     file = open(fullpath, "rb")
+     content_type, encoding = mimetypes.guess_type(fullpath)
+     content_type = content_type or "application/octet-stream"
+     if byte_range is None:
+          response = FileResponse(file, content_type=content_type)
+     else:
+          start, end = byte_range
+          response = FileResponse(RangedFile(file, start, end - start + 1), content_type=content_type, status=206)
+          response["Content-Length"] = end - start + 1
+          response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+     if encoding:
+          response["Content-Encoding"] = encoding
+     for header, value in headers.items():
+          response[header] = value
+     return response
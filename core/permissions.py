@@ -1,5 +1,6 @@
 from api.models import *
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from core.roles import in_groups
 
 """User Permissions"""
 class UserPermissionClass(BasePermission):
@@ -20,12 +21,12 @@ class UserPermissionClass(BasePermission):
                return (
                     obj == request.user
                     or request.user.is_superuser
-                    or request.user.groups.filter(name="Admins").exists()
+                    or in_groups(request.user, "Admins")
                )
           elif request.method == "POST":
                return (
                     request.user.is_superuser
-                    or request.user.groups.filter(name="Admins").exists()
+                    or in_groups(request.user, "Admins")
                )
           elif request.method == "PUT":
                return obj == request.user
@@ -33,7 +34,7 @@ class UserPermissionClass(BasePermission):
                return (
                     obj == request.user
                     or request.user.is_superuser
-                    or request.user.groups.filter(name="Admins").exists()
+                    or in_groups(request.user, "Admins")
                )
           return False
 
@@ -71,8 +72,7 @@ class GetArticles(BasePermission):
 class CreateArticle(BasePermission):
      def has_permission(self, request, view):
           return request.user and request.user.is_authenticated and (
-               request.user.groups.filter(name="Moderators").exists() or
-               request.user.groups.filter(name="Admins").exists() or
+               in_groups(request.user, "Moderators", "Admins") or
                request.user.is_superuser
           )
 
@@ -83,8 +83,8 @@ class EditArticle(BasePermission):
           if request.method == 'PUT':
                return (
                     request.user and request.user.is_authenticated and (
-                         obj.author_id == request.user.id and request.user.groups.filter(name="Moderators").exists() or
-                         request.user.groups.filter(name="Admins").exists() or
+                         obj.author_id == request.user.id and in_groups(request.user, "Moderators") or
+                         in_groups(request.user, "Admins") or
                          request.user.is_superuser
                     )
                )
@@ -97,8 +97,8 @@ class DeleteArticle(BasePermission):
           if request.method == 'DELETE':
                return (
                     request.user and request.user.is_authenticated and (
-                         obj.author_id == request.user.id and request.user.groups.filter(name="Moderators").exists() or
-                         request.user.groups.filter(name="Admins").exists() or
+                         obj.author_id == request.user.id and in_groups(request.user, "Moderators") or
+                         in_groups(request.user, "Admins") or
                          request.user.is_superuser
                     )
                )
@@ -112,9 +112,7 @@ class GetComments(BasePermission):
 class PostComment(BasePermission):
      def has_permission(self, request, view):
           return request.user and request.user.is_authenticated and (
-               request.user.groups.filter(name="Users").exists() or
-               request.user.groups.filter(name="Moderators").exists() or
-               request.user.groups.filter(name="Admins").exists() or
+               in_groups(request.user, "Users", "Moderators", "Admins") or
                request.user.is_superuser
           )
 
@@ -126,8 +124,7 @@ class EditComment(BasePermission):
                return (
                     request.user and request.user.is_authenticated and (
                          obj.author == request.user or
-                         request.user.groups.filter(name="Moderators").exists() or
-                         request.user.groups.filter(name="Admins").exists() or
+                         in_groups(request.user, "Moderators", "Admins") or
                          request.user.is_superuser
                     )
                )
@@ -141,7 +138,7 @@ class DeleteComment(BasePermission):
                return (
                     request.user and request.user.is_authenticated and (
                          obj.author_id == request.user.id or
-                         request.user.groups.filter(name="Admins").exists() or
+                         in_groups(request.user, "Admins") or
                          request.user.is_superuser
                     )
                )
@@ -155,9 +152,7 @@ class GetArticleLikes(BasePermission):
 class PostArticleLike(BasePermission):
      def has_permission(self, request, view):
           return request.user and request.user.is_authenticated and (
-               request.user.groups.filter(name="Users").exists() or
-               request.user.groups.filter(name="Moderators").exists() or
-               request.user.groups.filter(name="Admins").exists() or
+               in_groups(request.user, "Users", "Moderators", "Admins") or
                request.user.is_superuser
           )
 
@@ -177,4 +172,11 @@ class DeleteArticleLike(BasePermission):
                          obj.user_id == request.user.id
                     )
                )
-          return False
\ No newline at end of file
+          return False
+
+"""Data Export Permissions"""
+class ExportPermission(BasePermission):
+     def has_permission(self, request, view):
+          return request.user and request.user.is_authenticated and (
+               request.user.is_superuser or in_groups(request.user, "Admins")
+          )
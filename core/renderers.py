@@ -0,0 +1,39 @@
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Datetimes, Decimals, lazy translation strings and anything else orjson
+# cannot encode natively go through DRF's encoder, so documents match
+# JSONRenderer's (e.g. "Z" suffix for UTC datetimes).
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+_encoder = JSONEncoder()
+
+
+def dumps(data, indent=False):
+     options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+     return orjson.dumps(data, default=_encoder.default, option=options)
+
+class FastJSONRenderer(JSONRenderer):
+     """
+     JSONRenderer producing the same documents through orjson. Indentation
+     requested via the Accept header is rendered with two spaces.
+     """
+
+     def render(self, data, accepted_media_type=None, renderer_context=None):
+          if data is None:
+               return b''
+          renderer_context = renderer_context or {}
+          indent = self.get_indent(accepted_media_type, renderer_context)
+          # Like JSONRenderer, escape the line separators that are invalid in JavaScript source.
+          return dumps(data, indent=bool(indent)).replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+class FastJSONParser(JSONParser):
+     renderer_class = FastJSONRenderer
+
+     def parse(self, stream, media_type=None, parser_context=None):
+          try:
+               return orjson.loads(stream.read())
+          except orjson.JSONDecodeError as exc:
+               raise ParseError(f'JSON parse error - {exc}')
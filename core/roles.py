@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+
+ROLE_CACHE_PREFIX = "user-groups"
+DEFAULT_GROUPS = ["Users", "Moderators", "Admins"]
+
+_group_ids = {}
+
+
+def group_cache_key(user_id):
+     return f"{ROLE_CACHE_PREFIX}:{user_id}"
+
+def get_user_groups(user):
+     """
+     Returns the user's group names, loading them at most once per request
+     (memoized on the user object) and at most once per ROLE_CACHE_TIMEOUT
+     across requests.
+     """
+     if not user or not user.is_authenticated:
+          return frozenset()
+
+     names = getattr(user, "_group_names", None)
+     if names is None:
+          key = group_cache_key(user.pk)
+          names = cache.get(key)
+          if names is None:
+               names = frozenset(user.groups.values_list("name", flat=True))
+               cache.set(key, names, settings.ROLE_CACHE_TIMEOUT)
+          user._group_names = names
+     return names
+
+def remember_user_groups(user, group_names):
+     """Primes the caches for a user whose groups were just written directly."""
+     cache.set(group_cache_key(user.pk), frozenset(group_names), settings.ROLE_CACHE_TIMEOUT)
+
+def in_groups(user, *group_names):
+     return not get_user_groups(user).isdisjoint(group_names)
+
+def invalidate_user_groups(*user_ids):
+     cache.delete_many([group_cache_key(user_id) for user_id in user_ids])
+
+
+def ensure_default_groups():
+     """Creates the role groups; run after migrate so request paths never need to."""
+     from django.contrib.auth.models import Group
+
+     forget_group_ids()
+     for name in DEFAULT_GROUPS:
+          group, _ = Group.objects.get_or_create(name=name)
+          _group_ids[name] = group.pk
+
+def get_group_id(name):
+     """Process-wide cached primary key of a group, created on first use if missing."""
+     from django.contrib.auth.models import Group
+
+     if name not in _group_ids:
+          _group_ids[name] = Group.objects.get_or_create(name=name)[0].pk
+     return _group_ids[name]
+
+def forget_group_ids():
+     _group_ids.clear()
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_HASH_LENGTH = 12
+HASHED_NAME_PATTERN = re.compile(rf"\.[0-9a-f]{{{CONTENT_HASH_LENGTH}}}(?:_\w+)?\.\w+$")
+
+
+def content_hash(content):
+     sha = hashlib.sha256()
+     if hasattr(content, "seek"):
+          content.seek(0)
+     for chunk in content.chunks():
+          sha.update(chunk)
+     if hasattr(content, "seek"):
+          content.seek(0)
+     return sha.hexdigest()[:CONTENT_HASH_LENGTH]
+
+def is_hashed_name(name):
+     return bool(HASHED_NAME_PATTERN.search(name))
+
+class HashedFileSystemStorage(FileSystemStorage):
+     """
+     Stores every file as `<stem>.<content hash>.<ext>`, so a stored name
+     always refers to the same bytes and can be cached by clients forever.
+     The one exception is overwrite(), which the image pipeline uses to
+     normalize an upload right after it is stored.
+     """
+
+     def save(self, name, content, max_length=None):
+          if name is None:
+               name = content.name
+          if not hasattr(content, "chunks"):
+               content = File(content, name)
+          directory, filename = posixpath.split(name.replace("\\", "/"))
+          stem, extension = posixpath.splitext(filename)
+          hashed = f"{stem}.{content_hash(content)}{extension}"
+          return super().save(posixpath.join(directory, hashed), content, max_length=max_length)
+
+     def overwrite(self, name, content):
+          """
+          Replaces the bytes stored under `name` with a single rename, so
+          readers see either the old or the new file, never a partial one.
+          """
+          path = self.path(name)
+          with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=".overwrite-", delete=False) as temporary:
+               for chunk in content.chunks():
+                    temporary.write(chunk)
+          try:
+               shutil.copymode(path, temporary.name)
+               os.replace(temporary.name, path)
+          except OSError:
+               os.unlink(temporary.name)
+               raise
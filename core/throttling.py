@@ -0,0 +1,47 @@
+import math
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class FixedWindowRateThrottleMixin:
+     """
+     Counts requests per fixed time window with a single cache counter instead of
+     storing a timestamp history list, so each check is O(1) in time and space.
+     """
+
+     def allow_request(self, request, view):
+          if self.rate is None:
+               return True
+
+          self.key = self.get_cache_key(request, view)
+          if self.key is None:
+               return True
+
+          self.now = self.timer()
+          window = int(self.now // self.duration)
+          self.window_end = (window + 1) * self.duration
+          window_key = f"{self.key}_{window}"
+
+          remaining = max(math.ceil(self.window_end - self.now), 1)
+
+          if self.cache.add(window_key, 1, remaining):
+               return True
+          try:
+               count = self.cache.incr(window_key)
+          except ValueError:
+               # The counter expired between add() and incr().
+               self.cache.add(window_key, 1, remaining)
+               count = 1
+          else:
+               # Some backends (e.g. the file cache) rewrite the entry with the
+               # default timeout on incr(); put the window's expiry back.
+               self.cache.touch(window_key, remaining)
+          return count <= self.num_requests
+
+     def wait(self):
+          return max(self.window_end - self.now, 0)
+
+class FixedWindowAnonRateThrottle(FixedWindowRateThrottleMixin, AnonRateThrottle):
+     pass
+
+class FixedWindowUserRateThrottle(FixedWindowRateThrottleMixin, UserRateThrottle):
+     pass